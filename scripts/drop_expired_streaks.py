@@ -0,0 +1,47 @@
+import os
+import sys
+from pathlib import Path
+
+# Makes the skill package importable when the script is run as a file
+ROOT_DIR = str(Path(os.path.abspath(__file__)).parent.parent)
+
+sys.path.append(ROOT_DIR)
+
+import asyncio
+from argparse import ArgumentParser
+from datetime import UTC, datetime, timedelta
+
+from skill.db.repos.get_repo import get_repo
+
+# A streak is kept if the skill is used yesterday or today in the user's
+# timezone. The users timezones are not stored, but whatever the timezone
+# is, the yesterday's start is less than 48 hours ago.
+EXPIRATION_TIME = timedelta(hours=48)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description="Drops the streaks of the users which haven't used "
+        "the skill for more than 48 hours, so the scoreboard counts "
+        "actual streaks. Should be run nightly"
+    )
+
+    parser.add_argument(
+        "-c",
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="max number of users updated in one transaction",
+    )
+
+    args = vars(parser.parse_args())
+
+    repo = get_repo("sa")
+
+    dropped = asyncio.run(
+        repo.drop_expired_streaks(
+            datetime.now(UTC) - EXPIRATION_TIME, args["chunk_size"]
+        )
+    )
+
+    print(f"Dropped {dropped} expired streaks")
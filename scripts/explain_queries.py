@@ -0,0 +1,96 @@
+import os
+import sys
+from pathlib import Path
+
+# Makes the skill package importable when the script is run as a file
+ROOT_DIR = str(Path(os.path.abspath(__file__)).parent.parent)
+
+sys.path.append(ROOT_DIR)
+
+import asyncio
+import time
+from argparse import ArgumentParser
+from uuid import uuid4
+
+from sqlalchemy import func, select, text
+from sqlalchemy.sql import Select
+
+from skill.db.models.sa_models import ActivityModel, TipModel, UserModel
+from skill.db.sa_db_settings import engine
+
+
+def get_queries() -> dict[str, Select]:
+    """Returns the hot queries of SARepo which plans are checked"""
+    return {
+        "count_users_with_streak": select(func.count(UserModel.id)).where(
+            UserModel.streak <= 10
+        ),
+        "get_users": select(UserModel).order_by(UserModel.join_date).limit(10),
+        "get_topic_tips": select(TipModel)
+        .where(TipModel.tips_topic_id == uuid4())
+        .order_by(TipModel.created_date),
+        "get_activities": select(ActivityModel)
+        .order_by(ActivityModel.created_date)
+        .limit(10),
+    }
+
+
+async def explain(analyze: bool, runs: int) -> None:
+    async with engine.connect() as connection:
+        match connection.dialect.name:
+            case "postgresql":
+                prefix = (
+                    "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+                )
+            case "sqlite":
+                prefix = "EXPLAIN QUERY PLAN "
+            case name:
+                print(f"Dialect {name} is not supported")
+                sys.exit()
+
+        for name, query in get_queries().items():
+            compiled = query.compile(
+                connection, compile_kwargs={"literal_binds": True}
+            )
+
+            plan = (
+                await connection.execute(text(prefix + str(compiled)))
+            ).all()
+
+            start = time.perf_counter()
+            for _ in range(runs):
+                await connection.execute(query)
+            elapsed = (time.perf_counter() - start) / runs * 1000
+
+            print(f"--- {name}: {elapsed:.3f} ms per query")
+            for row in plan:
+                print(" ".join(str(column) for column in row))
+            print()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description="Prints the plans and timings of the hot repo queries. "
+        "Run it before and after applying a migration to compare them"
+    )
+
+    parser.add_argument(
+        "-A",
+        "--analyze",
+        action="store_true",
+        help="run EXPLAIN ANALYZE instead of EXPLAIN on PostgreSQL",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--runs",
+        type=int,
+        default=100,
+        help="how many times each query is run to measure its timing",
+    )
+
+    args = vars(parser.parse_args())
+
+    asyncio.run(explain(args["analyze"], args["runs"]))
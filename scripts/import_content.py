@@ -173,6 +173,9 @@ if __name__ == "__main__":
 
         loop.run_until_complete(repo.insert_tips(extracted_tips))
 
+    # Makes the running skill instances reload the cached content
+    loop.run_until_complete(repo.bump_content_version())
+
     print("Content successfully imported!")
 
     loop.close()
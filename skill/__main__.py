@@ -4,6 +4,14 @@ from aiohttp import web
 from skill.config import WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_URL_PATH
 from skill.handlers import dp
 
+
+async def close_storage(app: web.Application) -> None:
+    # Writes the buffered dialog states before exit
+    await dp.storage.close()
+    await dp.storage.wait_closed()
+
+
 if __name__ == "__main__":
     app = get_new_configured_app(dispatcher=dp, path=WEBHOOK_URL_PATH)
+    app.on_shutdown.append(close_storage)
     web.run_app(app, host=WEBAPP_HOST, port=int(WEBAPP_PORT), loop=dp.loop)
@@ -9,3 +9,8 @@ WEBHOOK_URL_PATH = os.getenv("WEBHOOK_URL_PATH") or "/"
 WEBAPP_HOST = os.getenv("WEBAPP_HOST") or "localhost"
 
 WEBAPP_PORT = os.getenv("WEBAPP_PORT") or 5555
+
+# "sa" keeps the dialog states in the DB shared by all the skill processes,
+# "session" keeps them in the session state of Alice (no server-side state),
+# "memory" keeps them in the process memory of a bounded size
+STORAGE_TYPE = os.getenv("STORAGE_TYPE") or "sa"
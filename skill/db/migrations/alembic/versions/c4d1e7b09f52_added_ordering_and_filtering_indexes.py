@@ -0,0 +1,32 @@
+"""Added ordering and filtering indexes
+
+Revision ID: c4d1e7b09f52
+Revises: a83f0d6e2c19
+Create Date: 2026-10-17 13:40:11.270583
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1e7b09f52'
+down_revision = 'a83f0d6e2c19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't be run inside of a transaction
+    # and doesn't lock the tables for writes on PostgreSQL
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_users_streak'), 'users', ['streak'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_users_join_date'), 'users', ['join_date'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_activities_created_date'), 'activities', ['created_date'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_tips_tips_topic_id_created_date', 'tips', ['tips_topic_id', 'created_date'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tips_tips_topic_id_created_date', table_name='tips', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_activities_created_date'), table_name='activities', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_users_join_date'), table_name='users', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_users_streak'), table_name='users', postgresql_concurrently=True)
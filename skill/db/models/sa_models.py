@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime, time, timedelta
+from typing import Any, Iterable
 from uuid import UUID
 
-from sqlalchemy import (Column, DateTime, ForeignKey, Integer, Interval,
-                        String, Table, Time, Uuid)
+from sqlalchemy import (JSON, Column, DateTime, ForeignKey, Index, Integer,
+                        Interval, String, Table, Time, Uuid)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from skill.db.repos.base_repo import BaseRepo
@@ -13,7 +14,13 @@ from skill.utils import TextWithTTS
 
 
 class BaseModel(DeclarativeBase):
-    pass
+    def as_row(self) -> dict[str, Any]:
+        """Returns the model's column values keyed by the columns names
+        so the model can be inserted with a bulk INSERT statement"""
+        return {
+            column.key: getattr(self, column.key)
+            for column in self.__table__.columns
+        }
 
 
 heard_tips_table = Table(
@@ -28,20 +35,20 @@ class UserModel(BaseModel):
     __tablename__ = "users"
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
-    streak: Mapped[int] = mapped_column(Integer)
+    streak: Mapped[int] = mapped_column(Integer, index=True)
     last_skill_use: Mapped[datetime | None] = mapped_column(
         DateTime(True), default=None
     )
     last_wake_up_time: Mapped[time | None] = mapped_column(
         Time(), default=None
     )
-    join_date: Mapped[datetime] = mapped_column(DateTime(True))
+    join_date: Mapped[datetime] = mapped_column(DateTime(True), index=True)
 
     heard_tips: Mapped[list[TipModel]] = relationship(
         "TipModel",
         back_populates="users_heard",
         order_by="TipModel.created_date",
-        lazy="selectin",
+        lazy="select",
         secondary=heard_tips_table,
     )
 
@@ -52,18 +59,30 @@ class UserModel(BaseModel):
         self.last_wake_up_time = entity.last_wake_up_time
         self.join_date = entity._join_date
 
-        self.heard_tips = [
-            TipModel(heard_tip) for heard_tip in entity._heard_tips
-        ]
+    def as_entity(
+        self, repo: BaseRepo, heard_tips: Iterable[UUID] | None = None
+    ) -> User:
+        """Converts the model to the User entity
+
+        Args:
+            repo (BaseRepo): repo of the entity
+
+            heard_tips (Iterable[UUID] | None, optional): ids of the heard
+            tips of the entity.
+            If None is passed, the entity is created without its heard tips,
+            they are loaded on demand with User.get_heard_tips.
+            Defaults to None.
 
-    def as_entity(self, repo: BaseRepo) -> User:
+        Returns:
+            User: the entity
+        """
         return User(
             id=self.id,
             streak=self.streak,
             last_skill_use=self.last_skill_use,
             last_wake_up_time=self.last_wake_up_time,
             join_date=self.join_date,
-            heard_tips=[tip.as_entity(repo) for tip in self.heard_tips],
+            heard_tips=heard_tips,
             repo=repo,
         )
 
@@ -76,7 +95,7 @@ class ActivityModel(BaseModel):
         String(512), unique=True, index=True
     )
     description_tts: Mapped[str] = mapped_column(String(512))
-    created_date: Mapped[datetime] = mapped_column(DateTime(True))
+    created_date: Mapped[datetime] = mapped_column(DateTime(True), index=True)
     occupation_time: Mapped[timedelta] = mapped_column(Interval)
 
     def __init__(self, entity: Activity):
@@ -102,6 +121,13 @@ class ActivityModel(BaseModel):
 
 class TipModel(BaseModel):
     __tablename__ = "tips"
+    __table_args__ = (
+        Index(
+            "ix_tips_tips_topic_id_created_date",
+            "tips_topic_id",
+            "created_date",
+        ),
+    )
 
     id: Mapped[UUID] = mapped_column(Uuid, primary_key=True)
     short_description_text: Mapped[str] = mapped_column(
@@ -142,7 +168,24 @@ class TipModel(BaseModel):
 
         self.created_date = entity._created_date
 
-    def as_entity(self, repo: BaseRepo) -> Tip:
+    def as_entity(
+        self, repo: BaseRepo, tips_topic: TipsTopic | None = None
+    ) -> Tip:
+        """Converts the model to the Tip entity
+
+        Args:
+            repo (BaseRepo): repo of the entity
+
+            tips_topic (TipsTopic | None, optional): tips topic of the entity.
+            If None is passed, the loaded tips_topic relationship is used.
+            Defaults to None.
+
+        Returns:
+            Tip: the entity
+        """
+        if tips_topic is None:
+            tips_topic = self.tips_topic.as_entity(repo)
+
         return Tip(
             id=self.id,
             created_date=self.created_date,
@@ -152,7 +195,7 @@ class TipModel(BaseModel):
             tip_content=TextWithTTS(
                 self.tip_content_text, self.tip_content_tts
             ),
-            tips_topic=self.tips_topic.as_entity(repo),
+            tips_topic=tips_topic,
             repo=repo,
         )
 
@@ -197,3 +240,37 @@ class TipsTopicModel(BaseModel):
             ),
             repo=repo,
         )
+
+
+class StreakStatsModel(BaseModel):
+    """Number of users having each streak. The table is maintained
+    by the repo on every change of the users streaks, so the users
+    are counted by streak without scanning the users table"""
+
+    __tablename__ = "streak_stats"
+
+    streak: Mapped[int] = mapped_column(Integer, primary_key=True)
+    users_count: Mapped[int] = mapped_column(Integer)
+
+
+class ContentVersionModel(BaseModel):
+    """Single row table with the version of the tips, tips topics
+    and activities. The version is bumped every time the content
+    is changed, so the content caches know when to reload it"""
+
+    __tablename__ = "content_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer)
+
+
+class DialogStateModel(BaseModel):
+    """FSM state and data of a user's dialog
+    stored by skill.storages.sa_storage.SAStorage"""
+
+    __tablename__ = "dialog_states"
+
+    user_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    state: Mapped[str] = mapped_column(String(64))
+    data: Mapped[dict[str, Any]] = mapped_column(JSON)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(True), index=True)
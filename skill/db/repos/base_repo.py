@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import abc
+from datetime import datetime
 from typing import (TYPE_CHECKING, Any, AsyncContextManager, Callable,
                     Iterable, Literal)
 from uuid import UUID
 
 if TYPE_CHECKING:
     from skill.entities import Activity, Tip, TipsTopic, User
+    from skill.sleep_calculator import ActivityIndex
 
 
 class RepoConfig:
@@ -24,7 +26,32 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def insert_user(self, user: User) -> User:
+    def unit_of_work(self) -> AsyncContextManager[None]:
+        """Opens a unit of work: all the repo methods called inside of it
+        share one connection and its changes are committed once on exit.
+        If an exception is raised inside of it, all the changes are
+        rolled back.
+
+        Usage:
+            async with repo.unit_of_work():
+                ...
+        """
+        pass
+
+    @abc.abstractmethod
+    async def insert_user(self, user: User, refresh: bool = False) -> User:
+        """Inserts the passed user entity into the db
+
+        Args:
+            user (User): user that is going to be inserted
+
+            refresh (bool, optional): whether to re-read the entity
+            from the db after inserting it or not.
+            Defaults to False.
+
+        Returns:
+            User: inserted entity
+        """
         pass
 
     @abc.abstractmethod
@@ -32,7 +59,35 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def insert_activity(self, activity: Activity) -> Activity:
+    async def get_or_create_user(self, user: User) -> User:
+        """Atomically gets the user with the passed entity's id
+        or inserts the passed entity if there is no such user in the db
+
+        Args:
+            user (User): user that is going to be inserted
+            if it is not found
+
+        Returns:
+            User: the user from the db or the inserted entity
+        """
+        pass
+
+    @abc.abstractmethod
+    async def insert_activity(
+        self, activity: Activity, refresh: bool = False
+    ) -> Activity:
+        """Inserts the passed activity entity into the db
+
+        Args:
+            activity (Activity): activity that is going to be inserted
+
+            refresh (bool, optional): whether to re-read the entity
+            from the db after inserting it or not.
+            Defaults to False.
+
+        Returns:
+            Activity: inserted entity
+        """
         pass
 
     @abc.abstractmethod
@@ -42,7 +97,21 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def insert_tips_topic(self, tips_topic: TipsTopic) -> TipsTopic:
+    async def insert_tips_topic(
+        self, tips_topic: TipsTopic, refresh: bool = False
+    ) -> TipsTopic:
+        """Inserts the passed tips topic entity into the db
+
+        Args:
+            tips_topic (TipsTopic): tips topic that is going to be inserted
+
+            refresh (bool, optional): whether to re-read the entity
+            from the db after inserting it or not.
+            Defaults to False.
+
+        Returns:
+            TipsTopic: inserted entity
+        """
         pass
 
     @abc.abstractmethod
@@ -52,7 +121,19 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def insert_tip(self, tip: Tip) -> Tip:
+    async def insert_tip(self, tip: Tip, refresh: bool = False) -> Tip:
+        """Inserts the passed tip entity into the db
+
+        Args:
+            tip (Tip): tip that is going to be inserted
+
+            refresh (bool, optional): whether to re-read the entity
+            from the db after inserting it or not.
+            Defaults to False.
+
+        Returns:
+            Tip: inserted entity
+        """
         pass
 
     @abc.abstractmethod
@@ -141,12 +222,39 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def update_user(self, user: User) -> User:
+    async def drop_expired_streaks(
+        self, last_skill_use_before: datetime, chunk_size: int = 1000
+    ) -> int:
+        """Drops the streaks of all the users which haven't used the skill
+        since the passed time. The users are processed in chunks of
+        chunk_size, each chunk in its own transaction, so the rows
+        are not locked for long. Shouldn't be called inside of
+        a unit of work.
+
+        Args:
+            last_skill_use_before (datetime): the users which last skill use
+            is earlier lose their streaks
+
+            chunk_size (int, optional): max number of users which streaks
+            are dropped in one transaction.
+            Defaults to 1000.
+
+        Returns:
+            int: the number of the dropped streaks
+        """
+        pass
+
+    @abc.abstractmethod
+    async def update_user(self, user: User, refresh: bool = False) -> User:
         """Updates the passed user entity in the db
 
         Args:
             user (User): user that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
@@ -156,12 +264,18 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def update_activity(self, activity: Activity) -> Activity:
+    async def update_activity(
+        self, activity: Activity, refresh: bool = False
+    ) -> Activity:
         """Updates the passed user entity in the db
 
         Args:
             activity (User): activity that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
@@ -171,12 +285,18 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def update_tips_topic(self, tips_topic: TipsTopic) -> TipsTopic:
+    async def update_tips_topic(
+        self, tips_topic: TipsTopic, refresh: bool = False
+    ) -> TipsTopic:
         """Updates the passed tips topic entity in the db
 
         Args:
             tips_topic (TipsTopic): tips topic that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
@@ -186,12 +306,16 @@ class BaseRepo(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def update_tip(self, tip: Tip) -> Tip:
+    async def update_tip(self, tip: Tip, refresh: bool = False) -> Tip:
         """Updates the passed tip entity in the db
 
         Args:
             tip (Tip): tip that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
@@ -204,6 +328,39 @@ class BaseRepo(abc.ABC):
     async def get_user_by_id(self, id: str) -> User | None:
         pass
 
+    @abc.abstractmethod
+    async def get_user_heard_tips(self, user_id: str) -> frozenset[UUID]:
+        """Returns the ids of the tips heard by the user with the passed id.
+        The user entities are read without their heard tips,
+        so this method is used to load them only when they are needed.
+
+        Args:
+            user_id (str): id of the user
+
+        Returns:
+            frozenset[UUID]: ids of the heard tips
+        """
+        pass
+
+    @abc.abstractmethod
+    async def get_random_unheard_tip(
+        self, user_id: str, topic_id: UUID
+    ) -> Tip | None:
+        """Picks a random tip of the topic that is not heard by the user.
+        If all the tips of the topic are heard, the heard tips of the topic
+        are dropped in the same transaction and a random tip of the topic
+        is returned.
+
+        Args:
+            user_id (str): id of the user
+
+            topic_id (UUID): id of the tips topic
+
+        Returns:
+            Tip | None: the picked tip or None if the topic has no tips
+        """
+        pass
+
     @abc.abstractmethod
     async def get_activity_by_id(self, id: UUID) -> Activity | None:
         pass
@@ -279,6 +436,16 @@ class BaseRepo(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    async def get_activity_index(self) -> ActivityIndex:
+        """Returns the index of all the activities from the DB
+        used to select the activities fitting in a period of time
+
+        Returns:
+            ActivityIndex: the index of all the activities
+        """
+        pass
+
     @abc.abstractmethod
     async def get_users(self, limit: int | None = None) -> list[User]:
         """If no limit provided, the method should return
@@ -293,10 +460,56 @@ class BaseRepo(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    async def get_content_version(self) -> int:
+        """Returns the current version of the tips, tips topics
+        and activities. 0 is returned if the content was never versioned.
+
+        Returns:
+            int: the content version
+        """
+        pass
+
+    @abc.abstractmethod
+    async def bump_content_version(self) -> int:
+        """Increases the version of the tips, tips topics and activities.
+        Should be called every time the content is changed, so
+        the content caches reload it.
+
+        Returns:
+            int: the new content version
+        """
+        pass
+
     @abc.abstractmethod
     async def count_all_users(self) -> int:
         pass
 
+    @abc.abstractmethod
+    async def get_streak_histogram(self) -> dict[int, int]:
+        """Counts the users having each streak
+
+        Returns:
+            dict[int, int]: numbers of users keyed by streaks
+        """
+        pass
+
+    @abc.abstractmethod
+    async def count_users_with_streak_at_most(
+        self, streak: int
+    ) -> tuple[int, int]:
+        """Counts the users which streak is not greater than the passed one
+        and all the users at once
+
+        Args:
+            streak (int): the streak
+
+        Returns:
+            tuple[int, int]: the number of the users with the streak not
+            greater than the passed one and the number of all the users
+        """
+        pass
+
     @abc.abstractmethod
     async def count_users_with_streak(
         self,
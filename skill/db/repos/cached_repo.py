@@ -0,0 +1,317 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import AsyncContextManager, Iterable, Literal
+from uuid import UUID
+
+from skill.db.repos.base_repo import BaseRepo, RepoConfig
+from skill.entities import Activity, Tip, TipsTopic, User
+from skill.sleep_calculator import ActivityIndex
+
+
+class CachedContentRepoConfig(RepoConfig):
+    repo: BaseRepo
+    version_check_interval: float
+
+    def __init__(
+        self, repo: BaseRepo, version_check_interval: float = 5.0
+    ) -> None:
+        """
+        Args:
+            repo (BaseRepo): the repo which reads are cached
+
+            version_check_interval (float, optional): min number of seconds
+            between checks of the content version in the wrapped repo.
+            Defaults to 5.0.
+        """
+        self.repo = repo
+        self.version_check_interval = version_check_interval
+
+
+class _ContentSnapshot:
+    """All the tips, tips topics and activities of one content version"""
+
+    version: int
+    activities: list[Activity]
+    activities_by_id: dict[UUID, Activity]
+    tips_topics: list[TipsTopic]
+    tips_topics_by_id: dict[UUID, TipsTopic]
+    tips_topics_by_name: dict[str, TipsTopic]
+    tips: list[Tip]
+    tips_by_id: dict[UUID, Tip]
+    topics_tips: dict[UUID, list[Tip]]
+    activity_index: ActivityIndex
+
+    def __init__(
+        self,
+        version: int,
+        activities: list[Activity],
+        tips_topics: list[TipsTopic],
+        tips: list[Tip],
+    ) -> None:
+        self.version = version
+        self.activities = activities
+        self.activities_by_id = {
+            activity._id: activity for activity in activities
+        }
+        self.activity_index = ActivityIndex(activities)
+        self.tips_topics = tips_topics
+        self.tips_topics_by_id = {topic._id: topic for topic in tips_topics}
+        self.tips_topics_by_name = {
+            topic.name.text: topic for topic in tips_topics
+        }
+        self.tips = tips
+        self.tips_by_id = {tip._id: tip for tip in tips}
+        self.topics_tips = {topic._id: [] for topic in tips_topics}
+
+        # tips are ordered by creation date, so are the topics tips
+        for tip in tips:
+            self.topics_tips.setdefault(tip.tips_topic._id, []).append(tip)
+
+
+class CachedContentRepo(BaseRepo):
+    """Read-through cache of the tips, tips topics and activities
+    of the wrapped repo. The content is read from the wrapped repo
+    at once and is served from memory until the content version
+    in the wrapped repo changes. Users are never cached.
+
+    The cached entities are shared between the callers, so they
+    shouldn't be changed without saving them through the repo.
+    """
+
+    def __init__(self, config: CachedContentRepoConfig) -> None:
+        self.__config = config
+        self.__repo = config.repo
+        self.__snapshot: _ContentSnapshot | None = None
+        self.__last_version_check = 0.0
+        self.__lock = asyncio.Lock()
+
+    async def __content(self) -> _ContentSnapshot:
+        """Returns the snapshot of the content, reloading it
+        if the content version in the wrapped repo is changed.
+        The version is checked at most once in version_check_interval."""
+        snapshot = self.__snapshot
+        if (
+            snapshot is not None
+            and time.monotonic() - self.__last_version_check
+            < self.__config.version_check_interval
+        ):
+            return snapshot
+
+        async with self.__lock:
+            snapshot = self.__snapshot
+            if (
+                snapshot is not None
+                and time.monotonic() - self.__last_version_check
+                < self.__config.version_check_interval
+            ):
+                # Another task has just checked the version
+                return snapshot
+
+            version = await self.__repo.get_content_version()
+
+            if snapshot is None or snapshot.version != version:
+                snapshot = _ContentSnapshot(
+                    version=version,
+                    activities=await self.__repo.get_activities(),
+                    tips_topics=await self.__repo.get_tips_topics(),
+                    tips=await self.__repo.get_tips(),
+                )
+                self.__snapshot = snapshot
+
+            self.__last_version_check = time.monotonic()
+
+            return snapshot
+
+    async def __content_changed(self) -> None:
+        """Bumps the content version and drops the cached content"""
+        await self.__repo.bump_content_version()
+
+        self.__snapshot = None
+
+    def unit_of_work(self) -> AsyncContextManager[None]:
+        return self.__repo.unit_of_work()
+
+    async def insert_user(self, user: User, refresh: bool = False) -> User:
+        return await self.__repo.insert_user(user, refresh)
+
+    async def insert_users(self, users: Iterable[User]) -> list[User]:
+        return await self.__repo.insert_users(users)
+
+    async def get_or_create_user(self, user: User) -> User:
+        return await self.__repo.get_or_create_user(user)
+
+    async def insert_activity(
+        self, activity: Activity, refresh: bool = False
+    ) -> Activity:
+        res = await self.__repo.insert_activity(activity, refresh)
+        await self.__content_changed()
+        return res
+
+    async def insert_activities(
+        self, activities: Iterable[Activity]
+    ) -> list[Activity]:
+        res = await self.__repo.insert_activities(activities)
+        await self.__content_changed()
+        return res
+
+    async def insert_tips_topic(
+        self, tips_topic: TipsTopic, refresh: bool = False
+    ) -> TipsTopic:
+        res = await self.__repo.insert_tips_topic(tips_topic, refresh)
+        await self.__content_changed()
+        return res
+
+    async def insert_tips_topics(
+        self, tips_topics: Iterable[TipsTopic]
+    ) -> list[TipsTopic]:
+        res = await self.__repo.insert_tips_topics(tips_topics)
+        await self.__content_changed()
+        return res
+
+    async def insert_tip(self, tip: Tip, refresh: bool = False) -> Tip:
+        res = await self.__repo.insert_tip(tip, refresh)
+        await self.__content_changed()
+        return res
+
+    async def insert_tips(self, tips: Iterable[Tip]) -> list[Tip]:
+        res = await self.__repo.insert_tips(tips)
+        await self.__content_changed()
+        return res
+
+    async def delete_all_users(self) -> None:
+        await self.__repo.delete_all_users()
+
+    async def delete_all_activities(self) -> None:
+        await self.__repo.delete_all_activities()
+        await self.__content_changed()
+
+    async def delete_all_tips_topics(self) -> None:
+        await self.__repo.delete_all_tips_topics()
+        await self.__content_changed()
+
+    async def delete_all_tips(self) -> None:
+        await self.__repo.delete_all_tips()
+        await self.__content_changed()
+
+    async def delete_user(self, user: User) -> User:
+        return await self.__repo.delete_user(user)
+
+    async def delete_activity(self, activity: Activity) -> Activity:
+        res = await self.__repo.delete_activity(activity)
+        await self.__content_changed()
+        return res
+
+    async def delete_tips_topic(self, tips_topic: TipsTopic) -> TipsTopic:
+        res = await self.__repo.delete_tips_topic(tips_topic)
+        await self.__content_changed()
+        return res
+
+    async def delete_tip(self, tip: Tip) -> Tip:
+        res = await self.__repo.delete_tip(tip)
+        await self.__content_changed()
+        return res
+
+    async def drop_expired_streaks(
+        self, last_skill_use_before: datetime, chunk_size: int = 1000
+    ) -> int:
+        return await self.__repo.drop_expired_streaks(
+            last_skill_use_before, chunk_size
+        )
+
+    async def update_user(self, user: User, refresh: bool = False) -> User:
+        return await self.__repo.update_user(user, refresh)
+
+    async def update_activity(
+        self, activity: Activity, refresh: bool = False
+    ) -> Activity:
+        res = await self.__repo.update_activity(activity, refresh)
+        await self.__content_changed()
+        return res
+
+    async def update_tips_topic(
+        self, tips_topic: TipsTopic, refresh: bool = False
+    ) -> TipsTopic:
+        res = await self.__repo.update_tips_topic(tips_topic, refresh)
+        await self.__content_changed()
+        return res
+
+    async def update_tip(self, tip: Tip, refresh: bool = False) -> Tip:
+        res = await self.__repo.update_tip(tip, refresh)
+        await self.__content_changed()
+        return res
+
+    async def get_user_by_id(self, id: str) -> User | None:
+        return await self.__repo.get_user_by_id(id)
+
+    async def get_user_heard_tips(self, user_id: str) -> frozenset[UUID]:
+        return await self.__repo.get_user_heard_tips(user_id)
+
+    async def get_random_unheard_tip(
+        self, user_id: str, topic_id: UUID
+    ) -> Tip | None:
+        return await self.__repo.get_random_unheard_tip(user_id, topic_id)
+
+    async def get_activity_by_id(self, id: UUID) -> Activity | None:
+        return (await self.__content()).activities_by_id.get(id)
+
+    async def get_tips_topic_by_id(self, id: UUID) -> TipsTopic | None:
+        return (await self.__content()).tips_topics_by_id.get(id)
+
+    async def get_tips_topic_by_name(self, name: str) -> TipsTopic | None:
+        return (await self.__content()).tips_topics_by_name.get(name)
+
+    async def get_tip_by_id(self, id: UUID) -> Tip | None:
+        return (await self.__content()).tips_by_id.get(id)
+
+    async def get_tips_topics(
+        self, limit: int | None = None
+    ) -> list[TipsTopic]:
+        return (await self.__content()).tips_topics[:limit]
+
+    async def get_topic_tips(self, topic_id: UUID) -> list[Tip]:
+        return list((await self.__content()).topics_tips.get(topic_id, []))
+
+    async def get_tips(self, limit: int | None = None) -> list[Tip]:
+        return (await self.__content()).tips[:limit]
+
+    async def get_activities(self, limit: int | None = None) -> list[Activity]:
+        return (await self.__content()).activities[:limit]
+
+    async def get_activity_index(self) -> ActivityIndex:
+        return (await self.__content()).activity_index
+
+    async def get_users(self, limit: int | None = None) -> list[User]:
+        return await self.__repo.get_users(limit)
+
+    async def get_content_version(self) -> int:
+        return await self.__repo.get_content_version()
+
+    async def bump_content_version(self) -> int:
+        version = await self.__repo.bump_content_version()
+
+        self.__snapshot = None
+
+        return version
+
+    async def count_all_users(self) -> int:
+        return await self.__repo.count_all_users()
+
+    async def get_streak_histogram(self) -> dict[int, int]:
+        return await self.__repo.get_streak_histogram()
+
+    async def count_users_with_streak_at_most(
+        self, streak: int
+    ) -> tuple[int, int]:
+        return await self.__repo.count_users_with_streak_at_most(streak)
+
+    async def count_users_with_streak(
+        self,
+        streak: int,
+        condition: Literal["<"]
+        | Literal[">"]
+        | Literal["<="]
+        | Literal[">="]
+        | Literal["=="],
+    ) -> int:
+        return await self.__repo.count_users_with_streak(streak, condition)
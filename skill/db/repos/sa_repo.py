@@ -1,169 +1,481 @@
-import asyncio
-from typing import Callable, Iterable, Literal
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Iterable, Literal
 from uuid import UUID
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import (Table, case, delete, exists, func, insert,
+                        literal_column, select, update)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from skill.db.models.sa_models import (ActivityModel, TipModel, TipsTopicModel,
-                                       UserModel)
+from skill.db.models.sa_models import (ActivityModel, ContentVersionModel,
+                                       StreakStatsModel, TipModel,
+                                       TipsTopicModel, UserModel,
+                                       heard_tips_table)
 from skill.db.repos.base_repo import BaseRepo, RepoConfig
 from skill.entities import Activity, Tip, TipsTopic, User
 from skill.exceptions import IncorrectConditionError, NoSuchEntityInDB
+from skill.sleep_calculator import ActivityIndex
 
 
 class SARepoConfig(RepoConfig):
     connection_provider: Callable[..., AsyncSession]
+    bulk_chunk_size: int
 
     def __init__(
-        self, connection_provider: Callable[..., AsyncSession]
+        self,
+        connection_provider: Callable[..., AsyncSession],
+        bulk_chunk_size: int = 1000,
     ) -> None:
+        """
+        Args:
+            connection_provider (Callable[..., AsyncSession]): factory
+            of the sessions used by the repo
+
+            bulk_chunk_size (int, optional): max number of rows inserted
+            by one statement of bulk insert methods.
+            Defaults to 1000.
+        """
         self.connection_provider = connection_provider
+        self.bulk_chunk_size = bulk_chunk_size
+
+
+# Id of the only row of the content_version table
+CONTENT_VERSION_ROW_ID = 1
+
+# Session of the unit of work opened in the current context, if any
+_unit_of_work_session: ContextVar[AsyncSession | None] = ContextVar(
+    "unit_of_work_session", default=None
+)
+
+# Streak stats changes of the unit of work opened in the current context.
+# They are written right before the commit, so the streak stats rows
+# are locked only for the end of the transaction.
+_unit_of_work_streak_changes: ContextVar[Counter[int] | None] = ContextVar(
+    "unit_of_work_streak_changes", default=None
+)
+
+
+def dialect_insert(session: AsyncSession, table: Table):
+    """Returns an INSERT construct of the session's dialect
+    which supports ON CONFLICT clauses
+
+    Args:
+        session (AsyncSession): session the statement is executed in
+
+        table (Table): table to insert into
+
+    Raises:
+        NotImplementedError: raised if the dialect doesn't support
+        ON CONFLICT clauses
+
+    Returns:
+        Insert: dialect specific INSERT construct
+    """
+    match session.get_bind().dialect.name:
+        case "postgresql":
+            return postgresql.insert(table)
+        case "sqlite":
+            return sqlite.insert(table)
+        case name:
+            raise NotImplementedError(
+                f"ON CONFLICT clauses are not supported for {name}"
+            )
 
 
 class SARepo(BaseRepo):
     def __init__(self, config: SARepoConfig) -> None:
         self.__config = config
 
-    async def insert_user(self, user: User) -> User:
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator[None]:
+        """Opens a unit of work: all the repo methods called inside of it
+        share one session and its changes are committed once on exit.
+        If an exception is raised inside of it, all the changes are
+        rolled back. Nested units of work join the outer one.
+
+        The session is stored in a context variable, so concurrent
+        tasks never share their units of work. The streak stats changes
+        are accumulated and written right before the commit.
+        """
+        if _unit_of_work_session.get() is not None:
+            yield
+            return
+
         async with self.__config.connection_provider() as session:
+            token = _unit_of_work_session.set(session)
+            changes_token = _unit_of_work_streak_changes.set(Counter())
+
+            try:
+                yield
+
+                await self.__write_streak_stats(
+                    session, _unit_of_work_streak_changes.get() or {}
+                )
+
+                await session.commit()
+            finally:
+                _unit_of_work_streak_changes.reset(changes_token)
+                _unit_of_work_session.reset(token)
+
+    @asynccontextmanager
+    async def __session(self) -> AsyncIterator[AsyncSession]:
+        """Provides the session of the current unit of work or
+        a new session if there is no unit of work opened"""
+        session = _unit_of_work_session.get()
+
+        if session is not None:
+            yield session
+            return
+
+        async with self.__config.connection_provider() as session:
+            yield session
+
+    async def __bulk_insert(
+        self, session: AsyncSession, table: Table, rows: list[dict[str, Any]]
+    ) -> None:
+        """Inserts the rows with executemany INSERT statements
+        of at most bulk_chunk_size rows each"""
+        chunk_size = self.__config.bulk_chunk_size
+
+        for start in range(0, len(rows), chunk_size):
+            end = start + chunk_size
+
+            await session.execute(insert(table), rows[start:end])
+
+    async def __commit(self, session: AsyncSession) -> None:
+        """Commits the session if it doesn't belong to a unit of work,
+        otherwise only flushes it leaving the commit to the unit of work"""
+        if session is _unit_of_work_session.get():
+            await session.flush()
+        else:
+            await session.commit()
+
+    async def __change_streak_stats(
+        self, session: AsyncSession, changes: dict[int, int]
+    ) -> None:
+        """Adds the numbers of users to the streak stats. Inside of
+        a unit of work the changes are written on its commit.
+
+        Args:
+            session (AsyncSession): session the changes are made in
+
+            changes (dict[int, int]): numbers of users to add keyed
+            by streaks. Negative numbers remove the users.
+        """
+        if session is _unit_of_work_session.get():
+            unit_of_work_changes = _unit_of_work_streak_changes.get()
+
+            if unit_of_work_changes is not None:
+                unit_of_work_changes.update(changes)
+                return
+
+        await self.__write_streak_stats(session, changes)
+
+    def __pending_streak_changes(self, session: AsyncSession) -> Counter[int]:
+        """Returns the streak stats changes of the unit of work which
+        are not written yet, so the reads made inside of it see them"""
+        if session is _unit_of_work_session.get():
+            return _unit_of_work_streak_changes.get() or Counter()
+
+        return Counter()
+
+    async def __write_streak_stats(
+        self, session: AsyncSession, changes: dict[int, int]
+    ) -> None:
+        """Writes the streak stats changes with one upsert statement"""
+        changes = {streak: count for streak, count in changes.items() if count}
+
+        if not changes:
+            return
+
+        table = StreakStatsModel.__table__
+        q = dialect_insert(session, table)  # type: ignore
+        q = q.on_conflict_do_update(
+            index_elements=[table.c.streak],  # type: ignore
+            set_={
+                "users_count": table.c.users_count  # type: ignore
+                + q.excluded.users_count
+            },
+        )
+
+        # Sorted rows keep the order of the row locks the same
+        # in all the transactions
+        await session.execute(
+            q,
+            [
+                {"streak": streak, "users_count": changes[streak]}
+                for streak in sorted(changes)
+            ],
+        )
+
+    async def insert_user(self, user: User, refresh: bool = False) -> User:
+        async with self.__session() as session:
             model = UserModel(user)
 
             session.add(model)
 
-            await session.commit()
+            await session.flush()
+
+            await self.__change_streak_stats(session, {user._streak: 1})
+
+            await self.__bulk_insert(
+                session,
+                heard_tips_table,
+                [
+                    {"user_id": user._id, "tip_id": tip_id}
+                    for tip_id in user._heard_tips
+                ],
+            )
+
+            await self.__commit(session)
+
+            user.clear_streak_changes()
+            user.clear_heard_tips_changes()
+
+            if refresh:
+                return await self.get_user_by_id(model.id)  # type: ignore
 
-            return await self.get_user_by_id(model.id)  # type: ignore
+            return model.as_entity(self, heard_tips=user._heard_tips)
 
     async def insert_users(self, users: Iterable[User]) -> list[User]:
-        async with self.__config.connection_provider() as session:
-            models = [UserModel(user) for user in users]
+        users = list(users)
+        models = [UserModel(user) for user in users]
+
+        async with self.__session() as session:
+            await self.__bulk_insert(
+                session,
+                UserModel.__table__,  # type: ignore
+                [model.as_row() for model in models],
+            )
 
-            session.add_all(models)
+            await self.__bulk_insert(
+                session,
+                heard_tips_table,
+                [
+                    {"user_id": user._id, "tip_id": tip_id}
+                    for user in users
+                    for tip_id in user._heard_tips
+                ],
+            )
 
-            await session.commit()
+            await self.__change_streak_stats(
+                session, Counter(user._streak for user in users)
+            )
 
-            return [
-                entity
-                for entity in await asyncio.gather(
-                    *[self.get_user_by_id(model.id) for model in models]
-                )
-            ]  # type: ignore
+            await self.__commit(session)
+
+        for user in users:
+            user.clear_streak_changes()
+
+        return [
+            model.as_entity(self, heard_tips=user._heard_tips)
+            for model, user in zip(models, users)
+        ]
+
+    def __inserted_user_clause(self, session: AsyncSession, user: User):
+        """Returns the clause returned by an upsert of the user which is
+        true for the inserted row and false for the existing one"""
+        match session.get_bind().dialect.name:
+            case "postgresql":
+                # The inserted row version is not updated by any transaction
+                return literal_column("xmax = 0")
+            case _:
+                # The existing user keeps its join date
+                return UserModel.join_date == user._join_date
+
+    async def get_or_create_user(self, user: User) -> User:
+        """Atomically gets the user with the passed entity's id
+        or inserts the passed entity if there is no such user in the db.
+
+        Both are made with a single INSERT ... ON CONFLICT DO UPDATE
+        RETURNING statement, so any contact of a user costs one round
+        trip. The no-op update makes the existing row returned. Heard tips
+        of the passed entity are not inserted, so it is expected to be
+        a new user without any.
 
-    async def insert_activity(self, activity: Activity) -> Activity:
-        async with self.__config.connection_provider() as session:
+        Args:
+            user (User): user that is going to be inserted
+            if it is not found
+
+        Returns:
+            User: the user from the db or the inserted entity
+        """
+        async with self.__session() as session:
+            q = dialect_insert(session, UserModel.__table__).values(
+                id=user._id,
+                streak=user._streak,
+                last_skill_use=user.last_skill_use,
+                last_wake_up_time=user.last_wake_up_time,
+                join_date=user._join_date,
+            )
+            q = q.on_conflict_do_update(
+                index_elements=[UserModel.id], set_={"id": q.excluded.id}
+            ).returning(
+                UserModel.streak,
+                UserModel.last_skill_use,
+                UserModel.last_wake_up_time,
+                UserModel.join_date,
+                self.__inserted_user_clause(session, user).label("inserted"),
+            )
+
+            row = (await session.execute(q)).one()
+
+            if row.inserted:
+                await self.__change_streak_stats(session, {user._streak: 1})
+
+            await self.__commit(session)
+
+            if row.inserted:
+                return user.clear_streak_changes()
+
+            return User(
+                id=user._id,
+                streak=row.streak,
+                last_skill_use=row.last_skill_use,
+                last_wake_up_time=row.last_wake_up_time,
+                heard_tips=None,
+                join_date=row.join_date,
+                repo=self,
+            )
+
+    async def insert_activity(
+        self, activity: Activity, refresh: bool = False
+    ) -> Activity:
+        async with self.__session() as session:
             model = ActivityModel(activity)
 
             session.add(model)
 
-            await session.commit()
+            await self.__commit(session)
 
-            return await self.get_activity_by_id(model.id)  # type: ignore
+            if refresh:
+                return await self.get_activity_by_id(model.id)  # type: ignore
+
+            return model.as_entity(self)
 
     async def insert_activities(
         self, activities: Iterable[Activity]
     ) -> list[Activity]:
-        async with self.__config.connection_provider() as session:
-            models = [ActivityModel(activity) for activity in activities]
+        activities = list(activities)
+        models = [ActivityModel(activity) for activity in activities]
+
+        async with self.__session() as session:
+            await self.__bulk_insert(
+                session,
+                ActivityModel.__table__,  # type: ignore
+                [model.as_row() for model in models],
+            )
 
-            session.add_all(models)
+            await self.__commit(session)
 
-            await session.commit()
+        return [model.as_entity(self) for model in models]
 
-            return [
-                entity
-                for entity in await asyncio.gather(
-                    *[self.get_activity_by_id(model.id) for model in models]
-                )
-            ]  # type: ignore
-
-    async def insert_tips_topic(self, tips_topic: TipsTopic) -> TipsTopic:
-        async with self.__config.connection_provider() as session:
+    async def insert_tips_topic(
+        self, tips_topic: TipsTopic, refresh: bool = False
+    ) -> TipsTopic:
+        async with self.__session() as session:
             model = TipsTopicModel(tips_topic)
 
             session.add(model)
 
-            await session.commit()
+            await self.__commit(session)
+
+            if refresh:
+                return await self.get_tips_topic_by_id(  # type: ignore
+                    model.id
+                )
 
-            return await self.get_tips_topic_by_id(model.id)  # type: ignore
+            return model.as_entity(self)
 
     async def insert_tips_topics(
         self, tips_topics: Iterable[TipsTopic]
     ) -> list[TipsTopic]:
-        async with self.__config.connection_provider() as session:
-            models = [TipsTopicModel(tips_topic) for tips_topic in tips_topics]
-
-            session.add_all(models)
+        tips_topics = list(tips_topics)
+        models = [TipsTopicModel(tips_topic) for tips_topic in tips_topics]
+
+        async with self.__session() as session:
+            await self.__bulk_insert(
+                session,
+                TipsTopicModel.__table__,  # type: ignore
+                [model.as_row() for model in models],
+            )
 
-            await session.commit()
+            await self.__commit(session)
 
-            return [
-                entity
-                for entity in await asyncio.gather(
-                    *[self.get_tips_topic_by_id(model.id) for model in models]
-                )
-            ]  # type: ignore
+        return [model.as_entity(self) for model in models]
 
-    async def insert_tip(self, tip: Tip) -> Tip:
-        async with self.__config.connection_provider() as session:
+    async def insert_tip(self, tip: Tip, refresh: bool = False) -> Tip:
+        async with self.__session() as session:
             model = TipModel(tip)
 
             session.add(model)
 
-            await session.commit()
+            await self.__commit(session)
 
-            return await self.get_tip_by_id(model.id)  # type: ignore
+            if refresh:
+                return await self.get_tip_by_id(model.id)  # type: ignore
+
+            return model.as_entity(self, tips_topic=tip.tips_topic)
 
     async def insert_tips(self, tips: Iterable[Tip]) -> list[Tip]:
-        async with self.__config.connection_provider() as session:
-            models = [TipModel(tip) for tip in tips]
+        tips = list(tips)
+        models = [TipModel(tip) for tip in tips]
+
+        async with self.__session() as session:
+            await self.__bulk_insert(
+                session,
+                TipModel.__table__,  # type: ignore
+                [model.as_row() for model in models],
+            )
 
-            session.add_all(models)
+            await self.__commit(session)
 
-            await session.commit()
-
-            return [
-                entity
-                for entity in await asyncio.gather(
-                    *[self.get_tip_by_id(model.id) for model in models]
-                )
-            ]
+        return [
+            model.as_entity(self, tips_topic=tip.tips_topic)
+            for model, tip in zip(models, tips)
+        ]
 
     async def delete_all_users(self) -> None:
         """Deletes ALL users entities from the db"""
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = delete(UserModel)
 
             await session.execute(q)
 
-            await session.commit()
+            await session.execute(delete(StreakStatsModel))
+
+            await self.__commit(session)
 
     async def delete_all_activities(self) -> None:
         """Deletes ALL activities entities from the db"""
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = delete(ActivityModel)
 
             await session.execute(q)
 
-            await session.commit()
+            await self.__commit(session)
 
     async def delete_all_tips_topics(self) -> None:
         """Deletes ALL tips AND ALL related tips from the db"""
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = delete(TipsTopicModel)
 
             await session.execute(q)
 
-            await session.commit()
+            await self.__commit(session)
 
     async def delete_all_tips(self) -> None:
         """Deletes ALL tips entities from the db"""
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = delete(TipModel)
 
             await session.execute(q)
 
-            await session.commit()
+            await self.__commit(session)
 
     async def delete_user(self, user: User) -> User:
         """Deletes the passed user entity from the db
@@ -177,7 +489,7 @@ class SARepo(BaseRepo):
         Returns:
             User: deleted entity
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             model = await session.get(UserModel, user._id)
 
             if not model:
@@ -185,7 +497,9 @@ class SARepo(BaseRepo):
 
             await session.delete(model)
 
-            await session.commit()
+            await self.__change_streak_stats(session, {model.streak: -1})
+
+            await self.__commit(session)
 
             return model.as_entity(self)
 
@@ -202,7 +516,7 @@ class SARepo(BaseRepo):
             Activity: deleted entity
         """
 
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             model = await session.get(ActivityModel, activity._id)
 
             if not model:
@@ -212,7 +526,7 @@ class SARepo(BaseRepo):
 
             await session.delete(model)
 
-            await session.commit()
+            await self.__commit(session)
 
             return model.as_entity(self)
 
@@ -230,7 +544,7 @@ class SARepo(BaseRepo):
             TipsTopic: deleted entity
         """
 
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             model = await session.get(TipsTopicModel, tips_topic._id)
 
             if not model:
@@ -240,7 +554,7 @@ class SARepo(BaseRepo):
 
             await session.delete(model)
 
-            await session.commit()
+            await self.__commit(session)
 
             return model.as_entity(self)
 
@@ -257,7 +571,7 @@ class SARepo(BaseRepo):
             Tip: deleted entity
         """
 
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             model = await session.get(TipModel, tip._id)
 
             if not model:
@@ -265,49 +579,200 @@ class SARepo(BaseRepo):
 
             await session.delete(model)
 
-            await session.commit()
+            await self.__commit(session)
 
             return model.as_entity(self)
 
-    async def update_user(self, user: User) -> User:
+    async def drop_expired_streaks(
+        self, last_skill_use_before: datetime, chunk_size: int = 1000
+    ) -> int:
+        """Drops the streaks of all the users which haven't used the skill
+        since the passed time. The users are processed in chunks of
+        chunk_size, each chunk in its own transaction, so the rows
+        are not locked for long. Shouldn't be called inside of
+        a unit of work.
+
+        The chunks are selected with keyset pagination by the users ids.
+        The rows locked by the skill are skipped, those users are
+        using the skill right now, so check_in updates their streaks.
+
+        Args:
+            last_skill_use_before (datetime): the users which last skill use
+            is earlier lose their streaks
+
+            chunk_size (int, optional): max number of users which streaks
+            are dropped in one transaction.
+            Defaults to 1000.
+
+        Returns:
+            int: the number of the dropped streaks
+        """
+        dropped = 0
+        last_id = ""
+
+        while True:
+            async with self.__session() as session:
+                q = (
+                    select(UserModel.id, UserModel.streak)
+                    .where(
+                        UserModel.id > last_id,
+                        UserModel.streak > 0,
+                        UserModel.last_skill_use < last_skill_use_before,
+                    )
+                    .order_by(UserModel.id)
+                    .limit(chunk_size)
+                    .with_for_update(skip_locked=True)
+                )
+
+                rows = (await session.execute(q)).tuples().all()
+
+                if not rows:
+                    return dropped
+
+                await session.execute(
+                    update(UserModel)
+                    .where(UserModel.id.in_([id for id, _ in rows]))
+                    .values(streak=0)
+                )
+
+                changes = {0: len(rows)}
+                for _, streak in rows:
+                    changes[streak] = changes.get(streak, 0) - 1
+
+                await self.__change_streak_stats(session, changes)
+
+                await self.__commit(session)
+
+            dropped += len(rows)
+            last_id = rows[-1][0]
+
+    async def update_user(self, user: User, refresh: bool = False) -> User:
         """Updates the passed user entity in the db
 
         Args:
             user (User): user that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
         Returns:
             User: updated entity
         """
-        async with self.__config.connection_provider() as session:
-            model_in_db = await session.get(UserModel, user._id)
+        async with self.__session() as session:
+            values = {
+                "last_skill_use": user.last_skill_use,
+                "last_wake_up_time": user.last_wake_up_time,
+                "join_date": user._join_date,
+            }
 
-            if not model_in_db:
-                raise NoSuchEntityInDB(f"No user with next id: {user._id}")
+            if user._streak == user._saved_streak:
+                res = await session.execute(
+                    update(UserModel)
+                    .where(UserModel.id == user._id)
+                    .values(**values)
+                )
 
-            model = UserModel(user)
+                if not res.rowcount:
+                    raise NoSuchEntityInDB(f"No user with next id: {user._id}")
+            else:
+                old_streak: int | None = user._saved_streak
+
+                # The streak is changed only if it is still the one
+                # the entity was read with, otherwise the stats are
+                # changed from the streak found in the DB
+                while True:
+                    res = await session.execute(
+                        update(UserModel)
+                        .where(
+                            UserModel.id == user._id,
+                            UserModel.streak == old_streak,
+                        )
+                        .values(streak=user._streak, **values)
+                    )
+
+                    if res.rowcount:
+                        break
+
+                    old_streak = (
+                        await session.execute(
+                            select(UserModel.streak).where(
+                                UserModel.id == user._id
+                            )
+                        )
+                    ).scalar()
+
+                    if old_streak is None:
+                        raise NoSuchEntityInDB(
+                            f"No user with next id: {user._id}"
+                        )
+
+                if old_streak != user._streak:
+                    await self.__change_streak_stats(
+                        session, {old_streak: -1, user._streak: 1}
+                    )
+
+            # Only the heard tips changes tracked by the entity are written
+            # instead of merging the whole heard tips collection
+            if user._heard_tips_dropped:
+                await session.execute(
+                    delete(heard_tips_table).where(
+                        heard_tips_table.c.user_id == user._id
+                    )
+                )
 
-            await session.merge(model)
+            if user._added_heard_tips:
+                await session.execute(
+                    dialect_insert(
+                        session, heard_tips_table
+                    ).on_conflict_do_nothing(),
+                    [
+                        {"user_id": user._id, "tip_id": tip_id}
+                        for tip_id in user._added_heard_tips
+                    ],
+                )
 
-            await session.commit()
+            # A model of the user loaded earlier in the same session
+            # has to load the changed heard tips again
+            model = session.identity_map.get(
+                session.identity_key(UserModel, user._id)
+            )
+
+            if model is not None:
+                session.expire(model, ["heard_tips"])
+
+            await self.__commit(session)
 
-            return await self.get_user_by_id(model.id)  # type: ignore
+            user.clear_streak_changes()
+            user.clear_heard_tips_changes()
 
-    async def update_activity(self, activity: Activity) -> Activity:
+            if refresh:
+                return await self.get_user_by_id(user._id)  # type: ignore
+
+            return user
+
+    async def update_activity(
+        self, activity: Activity, refresh: bool = False
+    ) -> Activity:
         """Updates the passed user entity in the db
 
         Args:
             activity (User): activity that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
         Returns:
             Activity: updated entity
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             model_in_db = await session.get(ActivityModel, activity._id)
 
             if not model_in_db:
@@ -315,27 +780,34 @@ class SARepo(BaseRepo):
                     f"No activity with next id: {activity._id}"
                 )
 
-            model = ActivityModel(activity)
+            model = await session.merge(ActivityModel(activity))
 
-            await session.merge(model)
+            await self.__commit(session)
 
-            await session.commit()
+            if refresh:
+                return await self.get_activity_by_id(model.id)  # type: ignore
 
-            return await self.get_activity_by_id(model.id)  # type: ignore
+            return model.as_entity(self)
 
-    async def update_tips_topic(self, tips_topic: TipsTopic) -> TipsTopic:
+    async def update_tips_topic(
+        self, tips_topic: TipsTopic, refresh: bool = False
+    ) -> TipsTopic:
         """Updates the passed tips topic entity in the db
 
         Args:
             tips_topic (TipsTopic): tips topic that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
         Returns:
             TipsTopic: updated entity
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             model_in_db = await session.get(TipsTopicModel, tips_topic._id)
 
             if not model_in_db:
@@ -343,27 +815,34 @@ class SARepo(BaseRepo):
                     f"No tips topic with next id: {tips_topic._id}"
                 )
 
-            model = TipsTopicModel(tips_topic)
+            model = await session.merge(TipsTopicModel(tips_topic))
 
-            await session.merge(model)
+            await self.__commit(session)
 
-            await session.commit()
+            if refresh:
+                return await self.get_tips_topic_by_id(  # type: ignore
+                    model.id
+                )
 
-            return await self.get_tips_topic_by_id(model.id)  # type: ignore
+            return model.as_entity(self)
 
-    async def update_tip(self, tip: Tip) -> Tip:
+    async def update_tip(self, tip: Tip, refresh: bool = False) -> Tip:
         """Updates the passed tip entity in the db
 
         Args:
             tip (Tip): tip that is going to be updated
 
+            refresh (bool, optional): whether to re-read the entity
+            from the db after updating it or not.
+            Defaults to False.
+
         Raises:
             NoSuchEntityInDB: raised if no such entity in the DB
 
         Returns:
             Tip: updated entity
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             model_in_db = await session.get(TipModel, tip._id)
 
             if not model_in_db:
@@ -371,24 +850,104 @@ class SARepo(BaseRepo):
                     f"No tips topic with next id: {tip._id}"
                 )
 
-            model = TipModel(tip)
+            model = await session.merge(TipModel(tip))
 
-            await session.merge(model)
+            await self.__commit(session)
 
-            await session.commit()
+            if refresh:
+                return await self.get_tip_by_id(model.id)  # type: ignore
 
-            return await self.get_tip_by_id(model.id)  # type: ignore
+            return model.as_entity(self, tips_topic=tip.tips_topic)
 
     async def get_user_by_id(self, id: str) -> User | None:
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(UserModel).where(UserModel.id == id)
 
             res = (await session.execute(q)).scalar()
 
             return res and res.as_entity(self)
 
+    async def get_user_heard_tips(self, user_id: str) -> frozenset[UUID]:
+        """Returns the ids of the tips heard by the user with the passed id.
+        The user entities are read without their heard tips,
+        so this method is used to load them only when they are needed.
+
+        Args:
+            user_id (str): id of the user
+
+        Returns:
+            frozenset[UUID]: ids of the heard tips
+        """
+        async with self.__session() as session:
+            q = select(heard_tips_table.c.tip_id).where(
+                heard_tips_table.c.user_id == user_id
+            )
+
+            res = (await session.execute(q)).scalars().all()
+
+            return frozenset(res)
+
+    async def get_random_unheard_tip(
+        self, user_id: str, topic_id: UUID
+    ) -> Tip | None:
+        """Picks a random tip of the topic that is not heard by the user.
+        If all the tips of the topic are heard, the heard tips of the topic
+        are dropped in the same transaction and a random tip of the topic
+        is returned.
+
+        Args:
+            user_id (str): id of the user
+
+            topic_id (UUID): id of the tips topic
+
+        Returns:
+            Tip | None: the picked tip or None if the topic has no tips
+        """
+        async with self.__session() as session:
+            heard = (
+                exists()
+                .where(
+                    heard_tips_table.c.user_id == user_id,
+                    heard_tips_table.c.tip_id == TipModel.id,
+                )
+                .label("heard")
+            )
+            # Unheard tips go first, so the heard ones are picked
+            # only if all the tips of the topic are heard
+            q = (
+                select(TipModel, heard)
+                .where(TipModel.tips_topic_id == topic_id)
+                .order_by(heard, func.random())
+                .limit(1)
+                # The topic is joined, so its selectin load isn't emitted
+                .options(joinedload(TipModel.tips_topic))
+            )
+
+            row = (await session.execute(q)).first()
+
+            if row is None:
+                return None
+
+            model, all_heard = row
+
+            if all_heard:
+                await session.execute(
+                    delete(heard_tips_table).where(
+                        heard_tips_table.c.user_id == user_id,
+                        heard_tips_table.c.tip_id.in_(
+                            select(TipModel.id).where(
+                                TipModel.tips_topic_id == topic_id
+                            )
+                        ),
+                    )
+                )
+
+            await self.__commit(session)
+
+            return model.as_entity(self)
+
     async def get_activity_by_id(self, id: UUID) -> Activity | None:
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(ActivityModel).where(ActivityModel.id == id)
 
             res = (await session.execute(q)).scalar()
@@ -396,7 +955,7 @@ class SARepo(BaseRepo):
             return res and res.as_entity(self)
 
     async def get_tips_topic_by_id(self, id: UUID) -> TipsTopic | None:
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(TipsTopicModel).where(TipsTopicModel.id == id)
 
             res = (await session.execute(q)).scalar()
@@ -404,7 +963,7 @@ class SARepo(BaseRepo):
             return res and res.as_entity(self)
 
     async def get_tips_topic_by_name(self, name: str) -> TipsTopic | None:
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(TipsTopicModel).where(TipsTopicModel.name_text == name)
 
             res = (await session.execute(q)).scalar()
@@ -412,7 +971,7 @@ class SARepo(BaseRepo):
             return res and res.as_entity(self)
 
     async def get_tip_by_id(self, id: UUID) -> Tip | None:
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(TipModel).where(TipModel.id == id)
 
             res = (await session.execute(q)).scalar()
@@ -432,7 +991,7 @@ class SARepo(BaseRepo):
         Returns:
             list[TipsTopic]: list with objects ordered by creation date
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = (
                 select(TipsTopicModel)
                 .order_by(TipsTopicModel.created_date)
@@ -457,7 +1016,7 @@ class SARepo(BaseRepo):
             list[Tip]: list with objects ordered by creation date
 
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = (
                 select(TipModel)
                 .where(TipModel.tips_topic_id == topic_id)
@@ -480,7 +1039,7 @@ class SARepo(BaseRepo):
         Returns:
             list[Tip]: list with objects ordered by creation date
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(TipModel).order_by(TipModel.created_date).limit(limit)
 
             res = (await session.execute(q)).scalars().all()
@@ -498,7 +1057,7 @@ class SARepo(BaseRepo):
         Returns:
             list[Activity]: list with objects ordered by creation date
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = (
                 select(ActivityModel)
                 .order_by(ActivityModel.created_date)
@@ -509,6 +1068,9 @@ class SARepo(BaseRepo):
 
             return [model.as_entity(self) for model in res]
 
+    async def get_activity_index(self) -> ActivityIndex:
+        return ActivityIndex(await self.get_activities())
+
     async def get_users(self, limit: int | None = None) -> list[User]:
         """If no limit provided, the method should return
         all tips topics from the DB
@@ -520,19 +1082,103 @@ class SARepo(BaseRepo):
         Returns:
             list[User]: list with objects ordered by joining date
         """
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(UserModel).order_by(UserModel.join_date).limit(limit)
 
             res = (await session.execute(q)).scalars().all()
 
             return [model.as_entity(self) for model in res]
 
+    async def get_content_version(self) -> int:
+        async with self.__session() as session:
+            q = select(ContentVersionModel.version).where(
+                ContentVersionModel.id == CONTENT_VERSION_ROW_ID
+            )
+
+            return (await session.execute(q)).scalar() or 0
+
+    async def bump_content_version(self) -> int:
+        async with self.__session() as session:
+            table = ContentVersionModel.__table__
+
+            q = (
+                dialect_insert(session, table)  # type: ignore
+                .values(id=CONTENT_VERSION_ROW_ID, version=1)
+                .on_conflict_do_update(
+                    index_elements=[table.c.id],  # type: ignore
+                    set_={"version": table.c.version + 1},  # type: ignore
+                )
+                .returning(table.c.version)  # type: ignore
+            )
+
+            version = (await session.execute(q)).scalar_one()
+
+            await self.__commit(session)
+
+            return version
+
     async def count_all_users(self) -> int:
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             q = select(func.count(UserModel.id))
 
             return (await session.execute(q)).scalar()  # type: ignore
 
+    async def get_streak_histogram(self) -> dict[int, int]:
+        async with self.__session() as session:
+            q = select(StreakStatsModel.streak, StreakStatsModel.users_count)
+
+            histogram = Counter(
+                dict((await session.execute(q)).tuples().all())
+            )
+            histogram.update(self.__pending_streak_changes(session))
+
+            return {
+                streak: count
+                for streak, count in histogram.items()
+                if count > 0
+            }
+
+    async def count_users_with_streak_at_most(
+        self, streak: int
+    ) -> tuple[int, int]:
+        """Counts the users which streak is not greater than the passed one
+        and all the users at once with a single query over the streak stats
+
+        Args:
+            streak (int): the streak
+
+        Returns:
+            tuple[int, int]: the number of the users with the streak not
+            greater than the passed one and the number of all the users
+        """
+        async with self.__session() as session:
+            q = select(
+                func.coalesce(
+                    func.sum(
+                        case(
+                            (
+                                StreakStatsModel.streak <= streak,
+                                StreakStatsModel.users_count,
+                            ),
+                            else_=0,
+                        )
+                    ),
+                    0,
+                ),
+                func.coalesce(func.sum(StreakStatsModel.users_count), 0),
+            )
+
+            at_most, total = (await session.execute(q)).one()
+
+            pending = self.__pending_streak_changes(session)
+
+            for changed_streak, count in pending.items():
+                total += count
+                if changed_streak <= streak:
+                    at_most += count
+
+            return at_most, total
+
     async def count_users_with_streak(
         self,
         streak: int,
@@ -542,7 +1188,7 @@ class SARepo(BaseRepo):
         | Literal[">="]
         | Literal["=="],
     ) -> int:
-        async with self.__config.connection_provider() as session:
+        async with self.__session() as session:
             Q_CONDITIONS = {
                 ">": UserModel.streak > streak,
                 "<": UserModel.streak < streak,
@@ -0,0 +1,28 @@
+from aioalice import Dispatcher
+from aioalice.types import AliceRequest
+
+from skill.storages.sa_storage import SAStorage
+from skill.storages.session_storage import SessionStateStorage
+
+
+class SkillDispatcher(Dispatcher):
+    """Dispatcher binding SessionStateStorage and SAStorage to the requests.
+    With any other storage it works as the aioalice's one."""
+
+    async def process_request(self, request: AliceRequest):
+        storage = self.storage
+        if isinstance(storage, SAStorage):
+            token = storage.bind()
+            try:
+                return await super().process_request(request)
+            finally:
+                storage.unbind(token)
+
+        if not isinstance(storage, SessionStateStorage):
+            return await super().process_request(request)
+
+        token = storage.bind(request)
+        try:
+            return storage.dump(await super().process_request(request))
+        finally:
+            storage.unbind(token)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, time, timedelta
+from typing import Iterable
 from uuid import UUID, uuid4
 
 from skill.db.repos.base_repo import BaseRepo
@@ -10,9 +11,13 @@ from skill.utils import IdComparable, TextWithTTS
 class User(IdComparable):
     _id: str
     _streak: int
+    _saved_streak: int
     last_skill_use: datetime | None
     last_wake_up_time: time | None
-    _heard_tips: list[Tip]
+    _heard_tips: frozenset[UUID]
+    _heard_tips_loaded: bool
+    _added_heard_tips: list[UUID]
+    _heard_tips_dropped: bool
     _join_date: datetime
 
     def __init__(
@@ -21,15 +26,23 @@ class User(IdComparable):
         streak: int,
         last_skill_use: datetime | None,
         last_wake_up_time: time | None,
-        heard_tips: list[Tip],
+        heard_tips: Iterable[UUID] | None,
         join_date: datetime,
         repo: BaseRepo,
     ) -> None:
         self._id = id
         self._streak = streak
+        # Streak saved in the DB, the streak stats are changed only
+        # if the streak differs from it
+        self._saved_streak = streak
         self.last_skill_use = last_skill_use
         self.last_wake_up_time = last_wake_up_time
-        self._heard_tips = heard_tips
+        # None means the heard tips are not loaded from the DB yet
+        self._heard_tips_loaded = heard_tips is not None
+        self._heard_tips = frozenset(heard_tips or ())
+        # Heard tips changes that are not saved to the DB yet
+        self._added_heard_tips = []
+        self._heard_tips_dropped = False
         self._join_date = join_date
         self.__repo = repo
 
@@ -43,13 +56,48 @@ class User(IdComparable):
 
         return self
 
+    async def get_heard_tips(self) -> frozenset[UUID]:
+        """Returns the ids of the tips heard by the user. Loads them
+        from the DB on the first call if the entity was read without them.
+
+        Returns:
+            frozenset[UUID]: ids of the heard tips
+        """
+        if not self._heard_tips_loaded:
+            if not self._heard_tips_dropped:
+                self._heard_tips |= await self.__repo.get_user_heard_tips(
+                    self._id
+                )
+            self._heard_tips_loaded = True
+
+        return self._heard_tips
+
     def drop_heard_tips(self) -> User:
-        self._heard_tips = []
+        self._heard_tips = frozenset()
+        self._heard_tips_loaded = True
+        self._added_heard_tips = []
+        self._heard_tips_dropped = True
 
         return self
 
     def add_heard_tip(self, tip: Tip) -> User:
-        self._heard_tips.append(tip)
+        self._heard_tips |= {tip._id}
+        self._added_heard_tips.append(tip._id)
+
+        return self
+
+    def clear_streak_changes(self) -> User:
+        """Marks the current streak as saved.
+        Should be called by a repo once the streak is saved."""
+        self._saved_streak = self._streak
+
+        return self
+
+    def clear_heard_tips_changes(self) -> User:
+        """Forgets the tracked heard tips changes.
+        Should be called by a repo once the changes are saved."""
+        self._added_heard_tips = []
+        self._heard_tips_dropped = False
 
         return self
 
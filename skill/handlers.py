@@ -1,22 +1,32 @@
 import datetime
 import logging
 
-from aioalice import Dispatcher
-from aioalice.dispatcher import MemoryStorage
-from aioalice.types import Button
 from aioalice.types.alice_request import AliceRequest
 from pytz import timezone
 
-from skill.db.repos.sa_repo import SARepo
-from skill.db.sa_db_settings import sa_repo_config
+from skill.config import STORAGE_TYPE
+from skill.db.repos.get_repo import get_repo
+from skill.dispatcher import SkillDispatcher
+from skill.messages import select
+from skill.messages.registry import get_buttons_with_text
 from skill.messages.ru_messages import RUMessages
-from skill.sleep_calculator import SleepMode
+from skill.router import IndexedHandler, IntentFilter
+from skill.scoreboard import StreakScoreboard
+from skill.sleep_calculator import SleepCalculator, SleepMode
 from skill.states import States
+from skill.storages.get_storage import get_storage
 from skill.user_manager import UserManager
 
 logging.basicConfig(format="%(asctime)s %(name)-12s %(levelname)-8s %(message)s")
 
-dp = Dispatcher(storage=MemoryStorage())
+dp = SkillDispatcher(storage=get_storage(STORAGE_TYPE))
+dp.requests_handlers = IndexedHandler(dp)
+
+repo = get_repo("cached_sa")
+
+scoreboard = StreakScoreboard()
+
+SleepCalculator.use_lookup_table()
 
 ICO_ID = "1540737/a491c8169a8b2597ba37"
 
@@ -38,13 +48,13 @@ MAIN_FUNCTIONALITY_ENTER = ["я хочу спать", "рассчитай сон
 # Using main functionality (sleep time calculation) (skip asking the time)
 MAIN_FUNCTIONALITY_ENTER_FAST = ["Во сколько", "Когда", "Через сколько"]
 # Choosing short sleep mode
-SHORT_SLEEP_KEYWORDS = RUMessages().SLEEP_MODES_NOMINATIVE[SleepMode.SHORT]
+SHORT_SLEEP_KEYWORDS = RUMessages.SLEEP_MODES_NOMINATIVE[SleepMode.SHORT]
 # Choosing very short sleep mode
-VERY_SHORT_SLEEP_KEYWORDS = RUMessages().SLEEP_MODES_NOMINATIVE[SleepMode.VERY_SHORT]
+VERY_SHORT_SLEEP_KEYWORDS = RUMessages.SLEEP_MODES_NOMINATIVE[SleepMode.VERY_SHORT]
 # Choosing long sleep mode
-LONG_SLEEP_KEYWORDS = RUMessages().SLEEP_MODES_NOMINATIVE[SleepMode.LONG]
+LONG_SLEEP_KEYWORDS = RUMessages.SLEEP_MODES_NOMINATIVE[SleepMode.LONG]
 # Choosing medium sleep mode
-MEDIUM_SLEEP_KEYWORDS = RUMessages().SLEEP_MODES_NOMINATIVE[SleepMode.MEDIUM]
+MEDIUM_SLEEP_KEYWORDS = RUMessages.SLEEP_MODES_NOMINATIVE[SleepMode.MEDIUM]
 # Yes answer
 YES_REPLICS = ["да", "конечно", "естественно", "хочу"]
 # No answer
@@ -59,26 +69,10 @@ HELP_REPLICS = ["помощь", "помогите", "справка"]
 QUIT_SKILL_REPLICS = ["выйди", "выход", "закрой навык"]
 
 
-def get_buttons_with_text(texts: list[str] | None) -> list[Button] | None:
-    if texts is None:
-        return None
-    result = []
-    for text in texts:
-        button = Button(title=text)  # type: ignore
-        result.append(button)
-
-    return result
-
-
-def contains_intent(req: AliceRequest, intent_name: str) -> bool:
-    return intent_name in req.request._raw_kwargs["nlu"].get("intents")
-
-
-@dp.request_handler(
-    state=States.SELECTING_TIME, func=lambda req: contains_intent(req, "YANDEX.HELP")
-)
+@dp.request_handler(state=States.SELECTING_TIME, func=IntentFilter("YANDEX.HELP"))
 async def time_form_info(alice_request: AliceRequest):
-    text_with_tts = RUMessages().get_sleep_form_message()
+    messages = select.for_locale(alice_request.meta.locale)
+    text_with_tts = messages.get_sleep_form_message()
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
@@ -87,10 +81,11 @@ async def time_form_info(alice_request: AliceRequest):
 
 @dp.request_handler(
     state=States.all(),  # type: ignore
-    func=lambda req: contains_intent(req, "QUIT_SKILL"),
+    func=IntentFilter("QUIT_SKILL"),
 )
 async def quit_skill(alice_request: AliceRequest):
-    text_with_tts = RUMessages().get_quit_message()
+    messages = select.for_locale(alice_request.meta.locale)
+    text_with_tts = messages.get_quit_message()
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
@@ -107,20 +102,21 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.all(),  # type: ignore
-    func=lambda req: contains_intent(req, "TO_MENU"),
+    func=IntentFilter("TO_MENU"),
     contains=TO_MENU_REPLICS,
 )
 async def go_to_menu(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
 
-    text_with_tts = RUMessages().get_menu_welcome_message()
+    text_with_tts = messages.get_menu_welcome_message()
 
     await dp.storage.set_state(user_id, States.MAIN_MENU)
 
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages.MENU_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.MENU_BUTTONS_TEXT),
     )
 
 
@@ -133,14 +129,15 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.all(),  # type: ignore
-    func=lambda req: contains_intent(req, "YANDEX.HELP"),
+    func=IntentFilter("YANDEX.HELP"),
 )
 async def ask_help(alice_request: AliceRequest):
-    text_with_tts = RUMessages().get_help_message()
+    messages = select.for_locale(alice_request.meta.locale)
+    text_with_tts = messages.get_help_message()
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages().HELP_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.HELP_BUTTONS_TEXT),
     )
 
 
@@ -153,17 +150,18 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.MAIN_MENU,
-    func=lambda req: contains_intent(req, "GIVE_INFO"),
+    func=IntentFilter("GIVE_INFO"),
 )  # type: ignore
 async def give_info(alice_request: AliceRequest):
-    text_with_tts = RUMessages().get_info_message()
+    messages = select.for_locale(alice_request.meta.locale)
+    text_with_tts = messages.get_info_message()
     return alice_request.response_big_image(
         text=text_with_tts.text,
         image_id=ICO_ID,
         title="О навыке",
         description=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages.MENU_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.MENU_BUTTONS_TEXT),
     )
 
 
@@ -176,14 +174,15 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.MAIN_MENU,
-    func=lambda req: contains_intent(req, "GIVE_WHAT_CAN_YOU_DO"),
+    func=IntentFilter("GIVE_WHAT_CAN_YOU_DO"),
 )  # type: ignore
 async def give_functions(alice_request: AliceRequest):
-    text_with_tts = RUMessages().get_what_can_you_do_message()
+    messages = select.for_locale(alice_request.meta.locale)
+    text_with_tts = messages.get_what_can_you_do_message()
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages.MENU_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.MENU_BUTTONS_TEXT),
     )
 
 
@@ -196,14 +195,16 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.ASKING_FOR_TIP,
-    func=lambda req: contains_intent(req, "WANT_NIGHT_TIP"),  # type: ignore
+    func=IntentFilter("WANT_NIGHT_TIP"),  # type: ignore
 )
 async def send_night_tip(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.ask_tip("ночной")
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
+        response = await user_manager.ask_tip("ночной")
     await dp.storage.set_state(user_id, response.state)
     text_with_tts = response.text_with_tts
     return alice_request.response(
@@ -222,14 +223,16 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.ASKING_FOR_TIP,
-    func=lambda req: contains_intent(req, "WANT_DAY_TIP"),
+    func=IntentFilter("WANT_DAY_TIP"),
 )  # type: ignore
 async def send_day_tip(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.ask_tip("дневной")
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
+        response = await user_manager.ask_tip("дневной")
     await dp.storage.set_state(user_id, response.state)
     text_with_tts = response.text_with_tts
     return alice_request.response(
@@ -248,7 +251,8 @@ dp.register_request_handler(
 
 @dp.request_handler(state=States.ASKING_FOR_TIP)  # type: ignore
 async def reask_tip_topic(alice_request: AliceRequest):
-    text_with_tts = RUMessages().get_wrong_topic_message("")
+    messages = select.for_locale(alice_request.meta.locale)
+    text_with_tts = messages.get_wrong_topic_message("")
     return alice_request.response(
         response_or_text=text_with_tts.text, tts=text_with_tts.tts
     )
@@ -256,16 +260,17 @@ async def reask_tip_topic(alice_request: AliceRequest):
 
 @dp.request_handler(
     state=States.MAIN_MENU,
-    func=lambda req: contains_intent(req, "ASK_FOR_TIP"),  # type: ignore
+    func=IntentFilter("ASK_FOR_TIP"),  # type: ignore
 )
 async def send_tip(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
-    text_with_tts = RUMessages().get_ask_tip_topic_message()
+    text_with_tts = messages.get_ask_tip_topic_message()
     await dp.storage.set_state(user_id, States.ASKING_FOR_TIP)
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages.TIP_TOPIC_SELECTION_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.TIP_TOPIC_SELECTION_BUTTONS_TEXT),
     )
 
 
@@ -278,9 +283,10 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.IN_CALCULATOR,
-    func=lambda req: contains_intent(req, "VERY_SHORT_SLEEP"),  # type: ignore,
+    func=IntentFilter("VERY_SHORT_SLEEP"),  # type: ignore,
 )
 async def choose_very_short_duration(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
     # time when user wants to get up, saved from previous dialogues
     time = await dp.storage.get_data(user_id)
@@ -294,14 +300,15 @@ async def choose_very_short_duration(alice_request: AliceRequest):
         .time()
         .replace(hour=hour, minute=minute, tzinfo=user_timezone)
     )
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.ask_sleep_time(
-        now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
-        wake_up_time=wake_up_time,
-        mode=SleepMode.VERY_SHORT,
-    )
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
+        response = await user_manager.ask_sleep_time(
+            now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
+            wake_up_time=wake_up_time,
+            mode=SleepMode.VERY_SHORT,
+        )
     text_with_tts = response.text_with_tts
     await dp.storage.set_state(user_id, States.CALCULATED)
     return alice_request.response(
@@ -320,9 +327,10 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.IN_CALCULATOR,
-    func=lambda req: contains_intent(req, "SHORT_SLEEP"),  # type: ignore
+    func=IntentFilter("SHORT_SLEEP"),  # type: ignore
 )
 async def choose_short_duration(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
     # time when user wants to get up, saved from previous dialogues
     time = await dp.storage.get_data(user_id)
@@ -336,14 +344,15 @@ async def choose_short_duration(alice_request: AliceRequest):
         .time()
         .replace(hour=hour, minute=minute, tzinfo=user_timezone)
     )
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.ask_sleep_time(
-        now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
-        wake_up_time=wake_up_time,
-        mode=SleepMode.SHORT,
-    )
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
+        response = await user_manager.ask_sleep_time(
+            now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
+            wake_up_time=wake_up_time,
+            mode=SleepMode.SHORT,
+        )
     text_with_tts = response.text_with_tts
     await dp.storage.set_state(user_id, States.CALCULATED)
     return alice_request.response(
@@ -362,9 +371,10 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.IN_CALCULATOR,
-    func=lambda req: contains_intent(req, "MEDIUM_SLEEP"),  # type: ignore
+    func=IntentFilter("MEDIUM_SLEEP"),  # type: ignore
 )
 async def choose_medium_duration(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
     # time when user wants to get up, saved from previous dialogues
     time = await dp.storage.get_data(user_id)
@@ -378,14 +388,15 @@ async def choose_medium_duration(alice_request: AliceRequest):
         .time()
         .replace(hour=hour, minute=minute, tzinfo=user_timezone)
     )
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.ask_sleep_time(
-        now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
-        wake_up_time=wake_up_time,
-        mode=SleepMode.MEDIUM,
-    )
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
+        response = await user_manager.ask_sleep_time(
+            now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
+            wake_up_time=wake_up_time,
+            mode=SleepMode.MEDIUM,
+        )
     text_with_tts = response.text_with_tts
     await dp.storage.set_state(user_id, States.CALCULATED)
     return alice_request.response(
@@ -404,9 +415,10 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.IN_CALCULATOR,
-    func=lambda req: contains_intent(req, "LONG_SLEEP"),  # type: ignore)
+    func=IntentFilter("LONG_SLEEP"),  # type: ignore)
 )
 async def choose_long_duration(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
     # time when user wants to get up, saved from previous dialogues
     time = await dp.storage.get_data(user_id)
@@ -420,14 +432,15 @@ async def choose_long_duration(alice_request: AliceRequest):
         .time()
         .replace(hour=hour, minute=minute, tzinfo=user_timezone)
     )
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.ask_sleep_time(
-        now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
-        wake_up_time=wake_up_time,
-        mode=SleepMode.LONG,
-    )
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
+        response = await user_manager.ask_sleep_time(
+            now=datetime.datetime.now(timezone(alice_request.meta.timezone)),
+            wake_up_time=wake_up_time,
+            mode=SleepMode.LONG,
+        )
     text_with_tts = response.text_with_tts
     await dp.storage.set_state(user_id, States.CALCULATED)
     return alice_request.response(
@@ -446,22 +459,23 @@ dp.register_request_handler(
 
 @dp.request_handler(state=States.SELECTING_TIME)  # type: ignore
 async def enter_calculator(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
     if "nlu" not in alice_request.request._raw_kwargs.keys():
-        response = RUMessages().get_ask_wake_up_time_message().text
+        response = messages.get_ask_wake_up_time_message().text
         return response
     try:
         value = alice_request.request._raw_kwargs["nlu"]["intents"]["sleep_calc"][
             "slots"
         ]["time"]["value"]
     except KeyError:
-        text_with_tts = RUMessages().get_wrong_time_message()
+        text_with_tts = messages.get_wrong_time_message()
         return alice_request.response(
             response_or_text=text_with_tts.text,
             tts=text_with_tts.tts,
         )
     if "hour" not in value.keys():
-        text_with_tts = RUMessages().get_wrong_time_message()
+        text_with_tts = messages.get_wrong_time_message()
         return alice_request.response(
             response_or_text=text_with_tts.text,
             tts=text_with_tts.tts,
@@ -470,19 +484,19 @@ async def enter_calculator(alice_request: AliceRequest):
         value["minutes"] = 0
     # save time sleep time
     await dp.storage.set_data(user_id, value)
-    text_with_tts = RUMessages().get_ask_sleep_mode_message()
+    text_with_tts = messages.get_ask_sleep_mode_message()
     await dp.storage.set_state(user_id, States.IN_CALCULATOR)
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages.SLEEP_MODE_SELECTION_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.SLEEP_MODE_SELECTION_BUTTONS_TEXT),
     )
 
 
 dp.register_request_handler(
     enter_calculator,
     state=States.MAIN_MENU,  # type: ignore
-    func=lambda req: contains_intent(req, "MAIN_FUNCTIONALITY_ENTER_FAST"),
+    func=IntentFilter("MAIN_FUNCTIONALITY_ENTER_FAST"),
 )
 
 dp.register_request_handler(
@@ -494,14 +508,16 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.MAIN_MENU,
-    func=lambda req: contains_intent(req, "MAIN_FUNCTIONALITY_ENTER"),  # type: ignore
+    func=IntentFilter("MAIN_FUNCTIONALITY_ENTER"),  # type: ignore
 )
 async def enter_calculator_with_no_time(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.get_ask_sleep_time_message()
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
+        response = await user_manager.get_ask_sleep_time_message()
     await dp.storage.set_state(user_id, response.state)
     text_with_tts = response.text_with_tts
     return alice_request.response(
@@ -520,11 +536,12 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.TIME_PROPOSED,
-    func=lambda req: contains_intent(req, "YANDEX.REJECT"),
+    func=IntentFilter("YANDEX.REJECT"),
 )  # type: ignore
 async def enter_calculator_new_time(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
-    text_with_tts = RUMessages().get_ask_wake_up_time_message()
+    text_with_tts = messages.get_ask_wake_up_time_message()
     await dp.storage.set_state(user_id, States.SELECTING_TIME)
     return alice_request.response(
         response_or_text=text_with_tts.text, tts=text_with_tts.tts
@@ -540,24 +557,26 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.TIME_PROPOSED,
-    func=lambda req: contains_intent(req, "YANDEX.CONFIRM"),
+    func=IntentFilter("YANDEX.CONFIRM"),
 )  # type: ignore
 async def enter_calculator_proposed_time(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id, repo=repo, messages=messages
+        )
     time = {
         "hour": user_manager.user.last_wake_up_time.hour,
         "minute": user_manager.user.last_wake_up_time.minute,
     }
     await dp.storage.set_data(user_id, time)
-    text_with_tts = RUMessages().get_ask_sleep_mode_message()
+    text_with_tts = messages.get_ask_sleep_mode_message()
     await dp.storage.set_state(user_id, States.IN_CALCULATOR)
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages.SLEEP_MODE_SELECTION_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.SLEEP_MODE_SELECTION_BUTTONS_TEXT),
     )
 
 
@@ -570,16 +589,17 @@ dp.register_request_handler(
 
 @dp.request_handler(
     state=States.CALCULATED,
-    func=lambda req: contains_intent(req, "YANDEX.REJECT"),
+    func=IntentFilter("YANDEX.REJECT"),
 )  # type: ignore
 async def end_skill(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
     await dp.storage.set_state(user_id, States.MAIN_MENU)
-    text_with_tts = RUMessages().get_good_night_message()
+    text_with_tts = messages.get_good_night_message()
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages().MENU_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.MENU_BUTTONS_TEXT),
     )
 
 
@@ -593,7 +613,7 @@ dp.register_request_handler(
 dp.register_request_handler(
     send_night_tip,
     state=States.CALCULATED,  # type: ignore
-    func=lambda req: contains_intent(req, "YANDEX.CONFIRM"),
+    func=IntentFilter("YANDEX.CONFIRM"),
     contains=YES_REPLICS,
 )
 
@@ -606,13 +626,18 @@ dp.register_request_handler(
 
 @dp.request_handler()
 async def welcome_user(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
-    user_manager = await UserManager.new_manager(
-        user_id=user_id, repo=SARepo(sa_repo_config), messages=RUMessages()
-    )
-    response = await user_manager.check_in(
-        now=datetime.datetime.now(timezone(alice_request.meta.timezone))
-    )
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            user_id=user_id,
+            repo=repo,
+            messages=messages,
+            scoreboard=scoreboard,
+        )
+        response = await user_manager.check_in(
+            now=datetime.datetime.now(timezone(alice_request.meta.timezone))
+        )
     text_with_tts = response.text_with_tts
     await dp.storage.set_state(user_id, States.MAIN_MENU)
     return alice_request.response(
@@ -624,17 +649,18 @@ async def welcome_user(alice_request: AliceRequest):
 
 @dp.errors_handler()
 async def error_handler(alice_request: AliceRequest, e):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
     state = await dp.storage.get_state(user_id)
     logging.error(str(state), exc_info=e)
-    text_with_tts = RUMessages().get_generic_error_message()
+    text_with_tts = messages.get_generic_error_message()
 
     await dp.storage.set_state(user_id, States.MAIN_MENU)
 
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages().MENU_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.MENU_BUTTONS_TEXT),
     )
 
 
@@ -642,14 +668,15 @@ async def error_handler(alice_request: AliceRequest, e):
     state=States.all(),  # type: ignore
 )
 async def universal_handler(alice_request: AliceRequest):
+    messages = select.for_locale(alice_request.meta.locale)
     user_id = alice_request.session.user_id
 
-    text_with_tts = RUMessages().get_menu_welcome_message()
+    text_with_tts = messages.get_menu_welcome_message()
 
     await dp.storage.set_state(user_id, States.MAIN_MENU)
 
     return alice_request.response(
         response_or_text=text_with_tts.text,
         tts=text_with_tts.tts,
-        buttons=get_buttons_with_text(RUMessages.MENU_BUTTONS_TEXT),
+        buttons=get_buttons_with_text(messages.MENU_BUTTONS_TEXT),
     )
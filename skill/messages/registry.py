@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Iterable, TypeVar
+
+from aioalice.types import Button
+
+from skill.messages.base_messages import BaseMessages
+from skill.messages.ru_messages import RUMessages
+
+MessagesT = TypeVar("MessagesT", bound=BaseMessages)
+
+# Messages classes have no state, so one instance per class is shared
+_messages: dict[type[BaseMessages], BaseMessages] = {}
+
+_buttons: dict[tuple[str, ...], list[Button]] = {}
+
+
+def get_messages(messages_cls: type[MessagesT]) -> MessagesT:
+    """Returns the shared instance of the messages class
+
+    Args:
+        messages_cls (type[MessagesT]): the messages class
+
+    Returns:
+        MessagesT: the instance created on the first call
+    """
+    messages = _messages.get(messages_cls)
+    if messages is None:
+        messages = _messages[messages_cls] = messages_cls()
+    return messages  # type: ignore
+
+
+def get_buttons_with_text(texts: Iterable[str] | None) -> list[Button] | None:
+    """Returns the buttons with the texts. The buttons of the same
+    texts are built once and are shared, so they mustn't be changed.
+
+    Args:
+        texts (Iterable[str] | None): the buttons titles
+
+    Returns:
+        list[Button] | None: the buttons or None if there are no texts
+    """
+    if texts is None:
+        return None
+
+    key = tuple(texts)
+    buttons = _buttons.get(key)
+    if buttons is None:
+        buttons = _buttons[key] = [
+            Button(title=text) for text in key  # type: ignore
+        ]
+    return buttons
+
+
+def warm_up(messages_cls: type[BaseMessages]) -> None:
+    """Creates the messages instance and builds the buttons
+    of all the *_BUTTONS_TEXT lists of the messages class"""
+    get_messages(messages_cls)
+
+    for name in dir(messages_cls):
+        if name.endswith("_BUTTONS_TEXT"):
+            get_buttons_with_text(getattr(messages_cls, name))
+
+
+warm_up(RUMessages)
@@ -1,3 +1,5 @@
+from skill.messages.base_messages import BaseMessages
+from skill.messages.registry import get_messages, warm_up
 from skill.messages.ru_messages import RUMessages
 
 POSIX_alliases = {"ru-RU": RUMessages}
@@ -18,3 +20,36 @@ def auto(locale):
     if locale not in POSIX_alliases:
         return RUMessages
     return POSIX_alliases[locale]
+
+
+# Shared messages instances of the supported locales, so resolving
+# the messages of a request is a single dict lookup
+_locale_messages: dict[str, BaseMessages] = {}
+
+
+def warm_up_locales() -> None:
+    """Creates the messages instances and the buttons of all
+    the supported locales"""
+    for locale in POSIX_alliases:
+        messages_cls = auto(locale)
+        warm_up(messages_cls)
+        _locale_messages[locale] = get_messages(messages_cls)
+
+
+def for_locale(locale):
+    """Returns the shared messages instance for the user's locale.
+    Unsupported locales get the messages auto() falls back to.
+
+    Args:
+        locale (str): POSIX language code
+
+    Returns:
+        BaseMessages: Messages instance for the specified language
+    """
+    messages = _locale_messages.get(locale)
+    if messages is None:
+        messages = get_messages(auto(locale))
+    return messages
+
+
+warm_up_locales()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable
+
+from aioalice.dispatcher.filters import (ContainsFilter, Filter, StateFilter,
+                                         StatesListFilter, check_filters)
+from aioalice.dispatcher.handler import Handler, SkipHandler
+from aioalice.types.alice_request import AliceRequest
+
+
+def get_intents(req: AliceRequest) -> dict[str, Any]:
+    """Returns the intents recognized in the request keyed by their names"""
+    nlu = req.request._raw_kwargs.get("nlu") or {}
+    return nlu.get("intents") or {}
+
+
+class IntentFilter(Filter):
+    """Checks if the intent is recognized in the request.
+    Unlike the lambda filters, it is indexed by IndexedHandler."""
+
+    def __init__(self, intent_name: str) -> None:
+        self.intent_name = intent_name
+
+    def check(self, req: AliceRequest) -> bool:
+        return self.intent_name in get_intents(req)
+
+
+class _KeywordTrie:
+    """Trie of the keywords finding all the keywords contained
+    in a command in O(len(command) * max keyword length)"""
+
+    def __init__(self) -> None:
+        self.__root: dict[str, Any] = {}
+
+    def add(self, keyword: str, value: int) -> None:
+        node = self.__root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node.setdefault("", []).append(value)
+
+    def find(self, text: str) -> set[int]:
+        """Returns the values of all the keywords contained in the text"""
+        res: set[int] = set()
+        for start in range(len(text)):
+            node = self.__root
+            for char in text[start:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                res.update(node.get("", ()))
+        return res
+
+
+class _Record:
+    """Registered handler with its filters split to the indexed ones
+    and the rest ones that are checked as is"""
+
+    def __init__(
+        self,
+        filters: list[Callable] | None,
+        handler: Callable,
+    ) -> None:
+        self.filters = filters
+        self.handler = handler
+        # None means any state
+        self.states: frozenset[str] | None = None
+        self.intent: str | None = None
+        self.keywords: list[str] | None = None
+        self.rest_filters: list[Callable] = []
+
+        contains_filter: ContainsFilter | None = None
+
+        for filter_ in filters or ():
+            if isinstance(filter_, StatesListFilter):
+                self.states = self.__join_states(filter_.state)
+            elif isinstance(filter_, StateFilter):
+                if filter_.state != "*":
+                    self.states = self.__join_states([filter_.state])
+            elif isinstance(filter_, IntentFilter) and self.intent is None:
+                self.intent = filter_.intent_name
+            elif (
+                isinstance(filter_, ContainsFilter) and contains_filter is None
+            ):
+                contains_filter = filter_
+            else:
+                self.rest_filters.append(filter_)
+
+        if contains_filter is None:
+            return
+
+        if (
+            self.intent is None
+            and contains_filter.lines
+            and all(contains_filter.lines)
+        ):
+            self.keywords = contains_filter.lines
+        else:
+            # Indexed by the intent or not indexed at all
+            # (an empty keyword is contained in any command)
+            self.rest_filters.append(contains_filter)
+
+    def __join_states(self, states: Iterable[str]) -> frozenset[str]:
+        if self.states is None:
+            return frozenset(states)
+        return self.states & frozenset(states)
+
+
+class IndexedHandler(Handler):
+    """Drop-in replacement of aioalice's requests Handler. Instead of
+    checking the filters of all the handlers one by one, it indexes
+    the handlers by their intents (see IntentFilter), by the keywords
+    of their contains filters and by their states. A request is checked
+    only against the handlers which intent or keywords it contains.
+
+    The user's state is read from the storage once per request. As with
+    the default Handler, the first registered matching handler is used.
+    """
+
+    def __init__(self, dispatcher) -> None:
+        super().__init__()
+        self.dispatcher = dispatcher
+        self.__records: list[_Record] | None = None
+        self.__by_intent: dict[str, list[int]] = {}
+        self.__trie = _KeywordTrie()
+        self.__unindexed: list[int] = []
+
+    def register(self, handler, filters=None, index=None):
+        super().register(handler, filters, index)
+        self.__records = None
+
+    def unregister(self, handler):
+        res = super().unregister(handler)
+        self.__records = None
+        return res
+
+    def __build(self) -> list[_Record]:
+        """Indexes the registered handlers by their positions"""
+        records = [
+            _Record(
+                list(filters) if filters is not None else None,
+                handler,
+            )
+            for filters, handler in self.handlers
+        ]
+
+        self.__by_intent = {}
+        self.__trie = _KeywordTrie()
+        self.__unindexed = []
+
+        for i, record in enumerate(records):
+            if record.intent is not None:
+                self.__by_intent.setdefault(record.intent, []).append(i)
+            elif record.keywords is not None:
+                for keyword in record.keywords:
+                    self.__trie.add(keyword, i)
+            else:
+                self.__unindexed.append(i)
+
+        self.__records = records
+        return records
+
+    async def notify(self, *args):
+        records = self.__records
+        if records is None:
+            records = self.__build()
+
+        req: AliceRequest = args[0]
+
+        candidates = set(self.__unindexed)
+        for intent in get_intents(req):
+            candidates.update(self.__by_intent.get(intent, ()))
+        candidates.update(self.__trie.find(req.request.command.lower()))
+
+        state = None
+        for i in sorted(candidates):
+            record = records[i]
+            if record.states is not None:
+                if state is None:
+                    state = await self.dispatcher.storage.get_state(
+                        req.session.user_id
+                    )
+                if state not in record.states:
+                    continue
+            if await check_filters(record.rest_filters, args):
+                try:
+                    return await record.handler(*args)
+                except SkipHandler:
+                    continue
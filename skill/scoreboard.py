@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from skill.db.repos.base_repo import BaseRepo
+
+
+class StreakScoreboard:
+    """In-memory histogram of the users streaks kept in a Fenwick tree,
+    so the number of users with a streak not greater than the given one
+    is counted in O(log n) instead of COUNT queries to the DB.
+
+    The histogram is seeded from the repo on the first use and is
+    updated by the user managers on streak changes. Since the other
+    instances of the skill change the streaks too, the histogram is
+    reloaded from the repo once in refresh_interval seconds.
+    """
+
+    def __init__(self, refresh_interval: float = 300.0) -> None:
+        """
+        Args:
+            refresh_interval (float, optional): min number of seconds
+            between reloads of the histogram from the repo.
+            Defaults to 300.0.
+        """
+        self.refresh_interval = refresh_interval
+        self.__tree: list[int] = [0]
+        self.__counts: list[int] = []
+        self.__total = 0
+        self.__loaded_at: float | None = None
+        self.__lock = asyncio.Lock()
+
+    @property
+    def total(self) -> int:
+        """The number of users in the scoreboard"""
+        return self.__total
+
+    def load(self, histogram: dict[int, int]) -> StreakScoreboard:
+        """Replaces the scoreboard content
+
+        Args:
+            histogram (dict[int, int]): numbers of users keyed by streaks
+
+        Returns:
+            StreakScoreboard: the scoreboard
+        """
+        size = max(histogram, default=0) + 1
+        self.__counts = [0] * size
+        for streak, count in histogram.items():
+            self.__counts[streak] = count
+        self.__rebuild()
+        self.__total = sum(self.__counts)
+        self.__loaded_at = time.monotonic()
+
+        return self
+
+    async def refresh(self, repo: BaseRepo) -> StreakScoreboard:
+        """Loads the histogram from the repo if it is not loaded yet
+        or was loaded more than refresh_interval seconds ago
+
+        Args:
+            repo (BaseRepo): the repo to load the histogram from
+
+        Returns:
+            StreakScoreboard: the scoreboard
+        """
+        if not self.__is_stale():
+            return self
+
+        async with self.__lock:
+            if self.__is_stale():
+                self.load(await repo.get_streak_histogram())
+
+        return self
+
+    def add(self, streak: int, count: int = 1) -> StreakScoreboard:
+        """Adds users with the streak to the scoreboard
+
+        Args:
+            streak (int): the users streak
+
+            count (int, optional): the number of users to add. Pass
+            a negative number to remove the users.
+            Defaults to 1.
+
+        Returns:
+            StreakScoreboard: the scoreboard
+        """
+        if streak >= len(self.__counts):
+            self.__counts.extend([0] * (streak + 1 - len(self.__counts)))
+            # Growing the counts at least twice keeps the rebuilds rare
+            self.__counts.extend([0] * len(self.__counts))
+            self.__rebuild()
+
+        self.__counts[streak] += count
+        self.__total += count
+
+        i = streak + 1
+        while i < len(self.__tree):
+            self.__tree[i] += count
+            i += i & -i
+
+        return self
+
+    def move(self, old_streak: int, new_streak: int) -> StreakScoreboard:
+        """Moves a user from one streak to another
+
+        Args:
+            old_streak (int): the user's streak before the change
+
+            new_streak (int): the user's streak after the change
+
+        Returns:
+            StreakScoreboard: the scoreboard
+        """
+        if old_streak != new_streak:
+            self.add(old_streak, -1)
+            self.add(new_streak)
+
+        return self
+
+    def count_at_most(self, streak: int) -> int:
+        """Counts the users which streak is not greater than the given one
+
+        Args:
+            streak (int): the streak
+
+        Returns:
+            int: the number of users
+        """
+        if streak < 0:
+            return 0
+
+        res = 0
+        i = min(streak + 1, len(self.__tree) - 1)
+        while i > 0:
+            res += self.__tree[i]
+            i -= i & -i
+
+        return res
+
+    def __is_stale(self) -> bool:
+        return (
+            self.__loaded_at is None
+            or time.monotonic() - self.__loaded_at >= self.refresh_interval
+        )
+
+    def __rebuild(self) -> None:
+        """Builds the Fenwick tree of the counts in O(n)"""
+        tree = [0] + self.__counts
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+
+        self.__tree = tree
@@ -1,10 +1,18 @@
+import bisect
+from array import array
 import datetime
+import random
 from skill.exceptions import InvalidInputError
-from typing import Iterable, Callable
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Mapping
 from skill.entities import Activity
+from skill.utils import LRUCache
 from dataclasses import dataclass
 import enum
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class SleepModeDoesntFitError(Exception):
     pass
@@ -17,6 +25,112 @@ class SleepMode(enum.Enum):
     VERY_SHORT = enum.auto()
 
 
+ZERO_TIME = datetime.timedelta(0)
+
+ONE_MINUTE = datetime.timedelta(minutes=1)
+
+
+class ActivityIndex:
+    """Activities sorted by their occupation time once, so the activities
+    fitting in a period of time are found with a binary search
+    instead of filtering and sorting all the activities every time"""
+
+    # Activities sorted by occupation time, the longest first
+    _activities: list[Activity]
+    # Negated occupation times of the activities, in ascending order
+    _keys: list[datetime.timedelta]
+
+    def __init__(
+        self, activities: Iterable[Activity], cache_size: int = 1024
+    ) -> None:
+        """
+        Args:
+            activities (Iterable[Activity]): the activities to index
+
+            cache_size (int, optional): the number of best_fitting results
+            memoized. An index is built per content version, so the memo
+            never outlives the content.
+            Defaults to 1024.
+        """
+        self._activities = sorted(
+            activities, key=lambda x: x.occupation_time, reverse=True
+        )
+        self._keys = [
+            -activity.occupation_time for activity in self._activities
+        ]
+        # If the occupation times are whole minutes, the periods of time
+        # are rounded up to minutes without changing the fitting
+        # activities, so the close periods share the memoized results
+        self._whole_minutes = not any(key % ONE_MINUTE for key in self._keys)
+        self.cache: LRUCache[
+            tuple[datetime.timedelta, int], tuple[Activity, ...]
+        ] = LRUCache(cache_size)
+
+    def __len__(self) -> int:
+        return len(self._activities)
+
+    def _first_fitting(self, delta: datetime.timedelta) -> int:
+        """Returns the position of the longest activity
+        which occupation time is less than delta"""
+        return bisect.bisect_right(self._keys, -delta)
+
+    def best_fitting(
+        self, delta: datetime.timedelta, limit: int = 2
+    ) -> list[Activity]:
+        """Returns the longest activities which occupation time
+        is less than delta
+
+        Args:
+            delta (datetime.timedelta): the period of time
+
+            limit (int, optional): the number of activities to return.
+            Defaults to 2
+
+        Returns:
+            list[Activity]: the activities, the longest first
+        """
+        if self._whole_minutes:
+            delta = -(-delta // ONE_MINUTE) * ONE_MINUTE
+
+        def compute() -> tuple[Activity, ...]:
+            start = self._first_fitting(delta)
+            end = start + limit
+            return tuple(self._activities[start:end])
+
+        return list(self.cache.get_or_compute((delta, limit), compute))
+
+    def random_fitting(
+        self,
+        delta: datetime.timedelta,
+        limit: int = 2,
+        pool_size: int | None = None,
+    ) -> list[Activity]:
+        """Returns random activities which occupation time is less than delta
+
+        Args:
+            delta (datetime.timedelta): the period of time
+
+            limit (int, optional): the number of activities to return.
+            Defaults to 2
+
+            pool_size (int | None, optional): the number of the longest
+            fitting activities to choose from. If None is passed,
+            all the fitting activities are used.
+            Defaults to None
+
+        Returns:
+            list[Activity]: the activities, the longest first
+        """
+        start = self._first_fitting(delta)
+        end = len(self._activities)
+        if pool_size is not None:
+            end = min(end, start + pool_size)
+        if end - start <= limit:
+            return self._activities[start:end]
+        positions = sorted(random.sample(range(start, end), limit))
+        return [self._activities[i] for i in positions]
+
+
 @dataclass
 class SleepCalculation:
     bed_time: datetime.datetime = datetime.datetime(datetime.MINYEAR, 1, 1)
@@ -25,39 +139,288 @@ class SleepCalculation:
     changed_mode: SleepMode | None = None
 
 
+# Codes of SleepCalculationBatch.changed_modes besides SleepMode values
+MODE_KEPT = 0
+NO_MODE_FITS = -1
+
+
+@dataclass
+class SleepCalculationBatch:
+    """Results of SleepCalculator.calc_many, one element per input"""
+
+    # datetime64[us], NaT if no mode fits
+    bed_times: "np.ndarray"
+    # timedelta64[us], NaT if no mode fits
+    sleep_times: "np.ndarray"
+    # int8: SleepMode.value of the mode proposed instead of the selected
+    # one, MODE_KEPT if the selected mode fits, NO_MODE_FITS if no mode
+    # fits or the wake up time is not later than the origin time
+    changed_modes: "np.ndarray"
+
+
+@dataclass(frozen=True)
+class SleepModeSpec:
+    """Declarative definition of a sleep mode. The sleep time of the mode
+    is the longest whole number of steps fitting in the time left after
+    offset, capped by max_time. The mode doesn't fit if it is less
+    than min_time."""
+
+    mode: SleepMode
+    # Modes with lower priorities are proposed first
+    # when the requested mode doesn't fit
+    priority: int
+    # Time needed to fall asleep
+    offset: datetime.timedelta
+    # Length of a sleep cycle
+    step: datetime.timedelta
+    min_time: datetime.timedelta
+    max_time: datetime.timedelta
+
+    def __post_init__(self) -> None:
+        if self.step <= ZERO_TIME or self.min_time <= ZERO_TIME:
+            raise ValueError(f"Step and min time of {self.mode} must be > 0")
+        if self.max_time < self.min_time:
+            raise ValueError(f"Max time of {self.mode} is less than min time")
+
+    @property
+    def min_delta(self) -> datetime.timedelta:
+        """The shortest time till the wake up in which the mode fits"""
+        return self.offset + -(-self.min_time // self.step) * self.step
+
+    def fit(self, delta: datetime.timedelta) -> datetime.timedelta:
+        """Returns the sleep time of the mode
+
+        Args:
+            delta (datetime.timedelta): the time till the wake up
+
+        Returns:
+            datetime.timedelta: the sleep time or zero timedelta
+            if the mode doesn't fit
+        """
+        sleep_time = min(
+            (delta - self.offset) // self.step * self.step, self.max_time
+        )
+        return sleep_time if sleep_time >= self.min_time else ZERO_TIME
+
+
+class CompiledSleepModes:
+    """Immutable snapshot of the registered sleep modes, compiled
+    for calc so its speed doesn't depend on the number of the modes
+    and their registration order"""
+
+    # The modes ordered by priority
+    specs: tuple[SleepModeSpec, ...]
+    by_mode: Mapping[SleepMode, SleepModeSpec]
+
+    def __init__(self, specs: Iterable[SleepModeSpec]) -> None:
+        self.specs = tuple(sorted(specs, key=lambda x: x.priority))
+        self.by_mode = MappingProxyType(
+            {spec.mode: spec for spec in self.specs}
+        )
+
+        # A mode fits in any time not shorter than its min_delta,
+        # so the fallback mode is the one of the best priority among
+        # the modes which min_delta is passed. It only changes at the
+        # min_deltas, which are found with a binary search.
+        thresholds: list[datetime.timedelta] = []
+        fallbacks: list[SleepModeSpec] = []
+        best: tuple[int, SleepModeSpec] | None = None
+        for rank, spec in sorted(
+            enumerate(self.specs), key=lambda x: x[1].min_delta
+        ):
+            if best is None or rank < best[0]:
+                best = (rank, spec)
+            thresholds.append(spec.min_delta)
+            fallbacks.append(best[1])
+
+        self.__thresholds = tuple(thresholds)
+        self.__fallbacks = tuple(fallbacks)
+
+    def fallback(self, delta: datetime.timedelta) -> SleepModeSpec | None:
+        """Returns the mode of the best priority fitting in delta
+
+        Args:
+            delta (datetime.timedelta): the time till the wake up
+
+        Returns:
+            SleepModeSpec | None: the mode or None if no mode fits
+        """
+        i = bisect.bisect_right(self.__thresholds, delta)
+        return self.__fallbacks[i - 1] if i else None
+
+
+class SleepModeRegistry:
+    """Sleep modes registered by the skill and the plugins. The modes
+    are compiled on the first use and can't be registered after that,
+    so the plugins register their modes at import time."""
+
+    def __init__(self) -> None:
+        self.__specs: dict[SleepMode, SleepModeSpec] = {}
+        self.__compiled: CompiledSleepModes | None = None
+
+    @property
+    def frozen(self) -> bool:
+        return self.__compiled is not None
+
+    def register(self, spec: SleepModeSpec) -> SleepModeSpec:
+        """Adds the sleep mode or replaces the one with the same mode
+
+        Args:
+            spec (SleepModeSpec): the sleep mode definition
+
+        Raises:
+            RuntimeError: if the modes are already compiled
+
+        Returns:
+            SleepModeSpec: the registered definition
+        """
+        if self.__compiled is not None:
+            raise RuntimeError(
+                "Sleep modes must be registered before the first calculation"
+            )
+        self.__specs[spec.mode] = spec
+        return spec
+
+    def compiled(self) -> CompiledSleepModes:
+        """Returns the compiled modes, freezing the registry"""
+        compiled = self.__compiled
+        if compiled is None:
+            compiled = self.__compiled = CompiledSleepModes(
+                self.__specs.values()
+            )
+        return compiled
+
+
+class SleepLookupTable:
+    """Precomputed results of SleepCalculator.calc for every whole number
+    of minutes till the wake up. The results are exact, since the times
+    of the modes are whole minutes, so the seconds of the time till
+    the wake up never change them.
+
+    The sleep times in minutes and the changed modes are kept
+    in flat arrays of (mode, minutes) cells, a few KB per mode.
+    """
+
+    def __init__(
+        self,
+        modes: CompiledSleepModes,
+        max_delta: datetime.timedelta = datetime.timedelta(hours=24),
+    ) -> None:
+        """
+        Args:
+            modes (CompiledSleepModes): the sleep modes
+
+            max_delta (datetime.timedelta, optional): the longest time
+            till the wake up in the table. Longer ones are not looked up.
+            Defaults to 24 hours.
+
+        Raises:
+            ValueError: if the times of a mode are not whole minutes
+        """
+        specs = modes.specs
+        for spec in specs:
+            times = (spec.offset, spec.step, spec.min_time, spec.max_time)
+            if any(time % ONE_MINUTE for time in times):
+                raise ValueError(f"Times of {spec.mode} are not whole minutes")
+
+        self.max_minutes = max_delta // ONE_MINUTE
+        self.__width = self.max_minutes + 1
+        self.__rows = {spec.mode: row for row, spec in enumerate(specs)}
+        # Changed modes codes are positions in this tuple
+        self.__changed_modes = (None,) + tuple(spec.mode for spec in specs)
+
+        self.__sleep_minutes = array("H")
+        self.__changed_mode_codes = array("B")
+
+        for spec in specs:
+            for minutes in range(self.__width):
+                delta = minutes * ONE_MINUTE
+                sleep_time = spec.fit(delta)
+                code = 0
+                if not sleep_time:
+                    fallback = modes.fallback(delta)
+                    if fallback is not None:
+                        sleep_time = fallback.fit(delta)
+                        code = specs.index(fallback) + 1
+                self.__sleep_minutes.append(sleep_time // ONE_MINUTE)
+                self.__changed_mode_codes.append(code)
+
+        # Shared timedeltas of all the sleep times in the table
+        self.__sleep_times = [
+            minutes * ONE_MINUTE
+            for minutes in range(max(self.__sleep_minutes, default=0) + 1)
+        ]
+
+    def lookup(
+        self, mode: SleepMode, delta: datetime.timedelta
+    ) -> tuple[datetime.timedelta, SleepMode | None] | None:
+        """Returns the precomputed result of the calculation
+
+        Args:
+            mode (SleepMode): user's desired sleep mode
+
+            delta (datetime.timedelta): the time till the wake up
+
+        Returns:
+            tuple[datetime.timedelta, SleepMode | None] | None: the sleep
+            time (zero timedelta if no mode fits) and the mode proposed
+            instead of the desired one. None if delta is out of the table.
+        """
+        minutes = delta // ONE_MINUTE
+        if not 0 <= minutes <= self.max_minutes:
+            return None
+
+        i = self.__rows[mode] * self.__width + minutes
+        return (
+            self.__sleep_times[self.__sleep_minutes[i]],
+            self.__changed_modes[self.__changed_mode_codes[i]],
+        )
+
+
 class SleepCalculator:
-    _mode_calculators: dict[
-        SleepMode,
-        Callable[[datetime.datetime, datetime.datetime], datetime.timedelta],
-    ] = {}
-    _mode_priorities: dict[
-        SleepMode,
-        int,
-    ] = {}
+    registry = SleepModeRegistry()
+    _lookup_table: SleepLookupTable | None = None
 
     @classmethod
-    def mode_calculator(cls, mode: SleepMode, priority: int):
-        def wrapper(func):
-            cls._mode_calculators[mode] = func
-            cls._mode_priorities[mode] = priority
+    def register_mode(cls, spec: SleepModeSpec) -> SleepModeSpec:
+        """Adds the sleep mode to the registry. See SleepModeRegistry.register
 
-            def newfunc(*args, **kwargs):
-                sleep_time = func(*args, **kwargs)
-                if sleep_time <= datetime.timedelta(0):
-                    raise SleepModeDoesntFitError(
-                        "Can't fit any sleep time in given range"
-                    )
-                return sleep_time
+        Args:
+            spec (SleepModeSpec): the sleep mode definition
 
-            return newfunc
+        Returns:
+            SleepModeSpec: the registered definition
+        """
+        return cls.registry.register(spec)
+
+    @classmethod
+    def use_lookup_table(
+        cls, max_delta: datetime.timedelta = datetime.timedelta(hours=24)
+    ) -> None:
+        """Precomputes the results of calc for every whole number
+        of minutes till the wake up up to max_delta, so calc does
+        a single lookup instead of the calculation. Call it once
+        at startup, it freezes the registry.
+
+        Args:
+            max_delta (datetime.timedelta, optional): the longest time
+            till the wake up in the table.
+            Defaults to 24 hours.
+        """
+        cls._lookup_table = SleepLookupTable(
+            cls.registry.compiled(), max_delta
+        )
 
-        return wrapper
+    @classmethod
+    def drop_lookup_table(cls) -> None:
+        """Makes calc calculate the results again"""
+        cls._lookup_table = None
 
     @staticmethod
     def activities_compilation(
         time_a: datetime.datetime,
         time_b: datetime.datetime,
-        all_activities: Iterable[Activity],
+        all_activities: Iterable[Activity] | ActivityIndex,
         limit: int = 2,
     ) -> list[Activity]:
         """Returns a number of activities that can be done between time_a and
@@ -68,7 +431,9 @@ class SleepCalculator:
 
             time_b (datetime.datetime): closing time boundary
 
-            all_activities (Iterable[Activity]): the pool of all activities
+            all_activities (Iterable[Activity] | ActivityIndex): the pool
+            of all activities. Pass an ActivityIndex built once to avoid
+            sorting the activities on every call
 
             limit (int, optional): the number of best fitting activities to
             return.
@@ -83,12 +448,9 @@ class SleepCalculator:
                 "Closing boundary cannot be less than the opening boundary"
             )
         delta = time_b - time_a
-        sorted_activities = sorted(
-            filter(lambda x: x.occupation_time < delta, all_activities),
-            reverse=True,
-            key=lambda x: x.occupation_time,
-        )
-        return sorted_activities[:limit]
+        if not isinstance(all_activities, ActivityIndex):
+            all_activities = ActivityIndex(all_activities)
+        return all_activities.best_fitting(delta, limit)
 
     @classmethod
     def calc(
@@ -124,104 +486,163 @@ class SleepCalculator:
                 "Wake up time is earlier than current time"
             )
 
+        delta = wake_up_time - origin_time
+
         result = SleepCalculation()
         result.selected_mode = mode
 
-        # Initial calculation for the desired mode
-        try:
-            result.sleep_time = cls._mode_calculators[mode](
-                origin_time, wake_up_time
+        looked_up = None
+        if cls._lookup_table is not None:
+            looked_up = cls._lookup_table.lookup(mode, delta)
+
+        if looked_up is not None:
+            result.sleep_time, result.changed_mode = looked_up
+        else:
+            modes = cls.registry.compiled()
+            result.sleep_time = modes.by_mode[mode].fit(delta)
+            if not result.sleep_time:
+                # Impossible mode: choose the mode that fits the most
+                fallback = modes.fallback(delta)
+                if fallback is not None:
+                    result.sleep_time = fallback.fit(delta)
+                    result.changed_mode = fallback.mode
+
+        if not result.sleep_time:
+            raise InvalidInputError(
+                "It is not possible to sleep in given period of time"
             )
-        except SleepModeDoesntFitError:
-            # Impossible mode: choose the mode that fits the most
-            sleep_time = None
-            for mode, calculator in sorted(
-                cls._mode_calculators.items(),
-                key=lambda pair: cls._mode_priorities[pair[0]],
-            ):
-                try:
-                    sleep_time = calculator(origin_time, wake_up_time)
-                except SleepModeDoesntFitError:
-                    continue
-                result.sleep_time = sleep_time
-                result.changed_mode = mode
-                break
 
-            if sleep_time is None:
-                raise InvalidInputError(
-                    "It is not possible to sleep in given period of time"
-                )
         result.bed_time = wake_up_time - result.sleep_time
         return result
 
+    @classmethod
+    def calc_many(
+        cls,
+        wake_up_times: "np.ndarray",
+        origin_times: "np.ndarray",
+        modes: "np.ndarray | SleepMode" = SleepMode.LONG,
+    ) -> SleepCalculationBatch:
+        """Vectorized calc for the offline calculations over many users.
+        Unlike calc, it doesn't raise on the impossible inputs and
+        the unknown mode codes, but marks them with NO_MODE_FITS.
+        Requires NumPy.
+
+        Args:
+            wake_up_times (np.ndarray): datetime64 array of the users'
+            desired times to wake up
+
+            origin_times (np.ndarray): datetime64 array of the starting
+            points in time, broadcast against wake_up_times
+
+            modes (np.ndarray | SleepMode, optional): integer array
+            of SleepMode values of the users' desired sleep modes
+            or one mode for all of them.
+            Defaults to SleepMode.LONG
+
+        Returns:
+            SleepCalculationBatch: the bed times, the sleep times
+            and the changed modes codes
+        """
+        import numpy as np
+
+        specs = cls.registry.compiled().specs
+        size = max(spec.mode.value for spec in specs) + 1
+        us = datetime.timedelta(microseconds=1)
+
+        def table(values: dict[int, datetime.timedelta]) -> np.ndarray:
+            res = np.zeros(size, dtype=np.int64)
+            for code, value in values.items():
+                res[code] = value // us
+            return res
+
+        offsets = table({spec.mode.value: spec.offset for spec in specs})
+        steps = table({spec.mode.value: spec.step for spec in specs})
+        min_times = table({spec.mode.value: spec.min_time for spec in specs})
+        max_times = table({spec.mode.value: spec.max_time for spec in specs})
+        # Slots of the unknown modes are never chosen, but mustn't
+        # divide by zero
+        steps[steps == 0] = 1
+
+        wake_up_times = np.asarray(wake_up_times, dtype="datetime64[us]")
+        origin_times = np.asarray(origin_times, dtype="datetime64[us]")
+        deltas = (wake_up_times - origin_times).astype(np.int64)
+
+        if isinstance(modes, SleepMode):
+            modes = np.full(deltas.shape, modes.value, dtype=np.int64)
+        else:
+            modes = np.broadcast_to(
+                np.asarray(modes, dtype=np.int64), deltas.shape
+            )
+
+        def fit(code) -> tuple[np.ndarray, np.ndarray]:
+            sleep_times = np.minimum(
+                (deltas - offsets[code]) // steps[code] * steps[code],
+                max_times[code],
+            )
+            return sleep_times, sleep_times >= min_times[code]
+
+        known = np.isin(modes, [spec.mode.value for spec in specs])
+        sleep_times, fits = fit(np.where(known, modes, 0))
+        fits &= known & (deltas > 0)
+        changed_modes = np.where(fits, MODE_KEPT, NO_MODE_FITS)
+
+        # Impossible modes: choose the mode that fits the most.
+        # Unknown modes are not replaced.
+        for spec in specs:
+            pending = known & (changed_modes == NO_MODE_FITS)
+            if not pending.any():
+                break
+            mode_sleep_times, mode_fits = fit(spec.mode.value)
+            chosen = pending & mode_fits & (deltas > 0)
+            sleep_times = np.where(chosen, mode_sleep_times, sleep_times)
+            changed_modes[chosen] = spec.mode.value
+
+        failed = changed_modes == NO_MODE_FITS
+        sleep_times = sleep_times.astype("timedelta64[us]")
+        sleep_times[failed] = np.timedelta64("NaT")
+        bed_times = wake_up_times - sleep_times
+
+        return SleepCalculationBatch(
+            bed_times=bed_times,
+            sleep_times=sleep_times,
+            changed_modes=changed_modes.astype(np.int8),
+        )
+
 
-# TODO: Change the sleep mode definition architecture to be more
-# developer-friendly (Issue #87)
-
-
-@SleepCalculator.mode_calculator(SleepMode.VERY_SHORT, 3)
-def vert_short_sleep(
-    origin_time: datetime.datetime, wake_up_time: datetime.datetime
-) -> datetime.timedelta:
-    origin_time += datetime.timedelta(minutes=10)
-    step = datetime.timedelta(hours=0, minutes=15)
-    delta = wake_up_time - origin_time
-    delta_steps = delta // step
-    sleep_time = delta_steps * step
-    min_time = datetime.timedelta(hours=0, minutes=15)
-    max_time = datetime.timedelta(hours=3, minutes=0)
-    sleep_time = min(sleep_time, max_time)
-    if sleep_time < min_time:
-        raise SleepModeDoesntFitError
-    return sleep_time
-
-
-@SleepCalculator.mode_calculator(SleepMode.SHORT, 2)
-def short_sleep(
-    origin_time: datetime.datetime, wake_up_time: datetime.datetime
-) -> datetime.timedelta:
-    origin_time += datetime.timedelta(minutes=20)
-    step = datetime.timedelta(hours=1, minutes=00)
-    delta = wake_up_time - origin_time
-    delta_steps = delta // step
-    sleep_time = delta_steps * step
-    min_time = datetime.timedelta(hours=3, minutes=0)
-    max_time = datetime.timedelta(hours=6, minutes=0)
-    sleep_time = min(sleep_time, max_time)
-    if sleep_time < min_time:
-        raise SleepModeDoesntFitError
-    return sleep_time
-
-
-@SleepCalculator.mode_calculator(SleepMode.MEDIUM, 1)
-def medium_sleep(
-    origin_time: datetime.datetime, wake_up_time: datetime.datetime
-) -> datetime.timedelta:
-    origin_time += datetime.timedelta(minutes=20)
-    step = datetime.timedelta(hours=1, minutes=30)
-    delta = wake_up_time - origin_time
-    delta_steps = delta // step
-    sleep_time = delta_steps * step
-    min_time = datetime.timedelta(hours=6, minutes=0)
-    max_time = datetime.timedelta(hours=9, minutes=0)
-    sleep_time = min(sleep_time, max_time)
-    if sleep_time < min_time:
-        raise SleepModeDoesntFitError
-    return sleep_time
-
-
-@SleepCalculator.mode_calculator(SleepMode.LONG, 0)
-def long_sleep(
-    origin_time: datetime.datetime, wake_up_time: datetime.datetime
-) -> datetime.timedelta:
-    origin_time += datetime.timedelta(minutes=20)
-    step = datetime.timedelta(hours=1, minutes=30)
-    delta = wake_up_time - origin_time
-    delta_steps = delta // step
-    sleep_time = delta_steps * step
-    min_time = datetime.timedelta(hours=9, minutes=0)
-    max_time = datetime.timedelta(hours=12, minutes=0)
-    sleep_time = min(sleep_time, max_time)
-    if sleep_time < min_time:
-        raise SleepModeDoesntFitError
-    return sleep_time
+SLEEP_MODE_SPECS = (
+    SleepModeSpec(
+        mode=SleepMode.LONG,
+        priority=0,
+        offset=datetime.timedelta(minutes=20),
+        step=datetime.timedelta(hours=1, minutes=30),
+        min_time=datetime.timedelta(hours=9),
+        max_time=datetime.timedelta(hours=12),
+    ),
+    SleepModeSpec(
+        mode=SleepMode.MEDIUM,
+        priority=1,
+        offset=datetime.timedelta(minutes=20),
+        step=datetime.timedelta(hours=1, minutes=30),
+        min_time=datetime.timedelta(hours=6),
+        max_time=datetime.timedelta(hours=9),
+    ),
+    SleepModeSpec(
+        mode=SleepMode.SHORT,
+        priority=2,
+        offset=datetime.timedelta(minutes=20),
+        step=datetime.timedelta(hours=1),
+        min_time=datetime.timedelta(hours=3),
+        max_time=datetime.timedelta(hours=6),
+    ),
+    SleepModeSpec(
+        mode=SleepMode.VERY_SHORT,
+        priority=3,
+        offset=datetime.timedelta(minutes=10),
+        step=datetime.timedelta(minutes=15),
+        min_time=datetime.timedelta(minutes=15),
+        max_time=datetime.timedelta(hours=3),
+    ),
+)
+
+for spec in SLEEP_MODE_SPECS:
+    SleepCalculator.register_mode(spec)
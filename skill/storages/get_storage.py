@@ -0,0 +1,25 @@
+from typing import Literal
+
+from aioalice.dispatcher.storage import BaseStorage
+
+from skill.db.sa_db_settings import async_session
+from skill.storages.memory_storage import (BoundedMemoryStorage,
+                                           BoundedMemoryStorageConfig)
+from skill.storages.sa_storage import SAStorage, SAStorageConfig
+from skill.storages.session_storage import SessionStateStorage
+
+
+def get_storage(
+    storage_type: Literal["memory", "sa", "session"]
+) -> BaseStorage:
+    match storage_type:
+        case "memory":
+            return BoundedMemoryStorage(BoundedMemoryStorageConfig())
+        case "sa":
+            return SAStorage(
+                SAStorageConfig(connection_provider=async_session)
+            )
+        case "session":
+            return SessionStateStorage()
+        case _:
+            raise ValueError(f"Unknown storage type: {storage_type}")
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import copy
+import time
+from collections import OrderedDict
+from typing import Any
+
+from aioalice.dispatcher.storage import DEFAULT_STATE, BaseStorage
+
+
+class BoundedMemoryStorageConfig:
+    max_size: int
+    ttl: float
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 3600.0) -> None:
+        """
+        Args:
+            max_size (int, optional): max number of the dialog states
+            kept. The least recently used ones are evicted beyond it.
+            Defaults to 100_000.
+
+            ttl (float, optional): number of seconds after the last use
+            in which a dialog state expires. Alice ends an idle session
+            much earlier, so the expired states are never needed.
+            Defaults to 3600.0.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+
+class _Entry:
+    __slots__ = ("state", "data", "expires_at")
+
+    def __init__(
+        self, state: str, data: dict[str, Any], expires_at: float
+    ) -> None:
+        self.state = state
+        self.data = data
+        self.expires_at = expires_at
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """In-memory dialog states storage of a bounded size. Unlike
+    aioalice's MemoryStorage, it drops the dialog states which are not
+    used for ttl seconds and the least recently used ones beyond
+    max_size, so the memory doesn't grow with every new user.
+
+    The dialog states are kept in the order of their last use, which
+    is also the order of their expiration, so both the expiration
+    and the eviction pop the oldest ones in O(1).
+    """
+
+    def __init__(self, config: BoundedMemoryStorageConfig) -> None:
+        self.__config = config
+        self.__entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.__expired_count = 0
+        self.__evicted_count = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def expired_count(self) -> int:
+        """The number of the dialog states dropped on expiration"""
+        return self.__expired_count
+
+    @property
+    def evicted_count(self) -> int:
+        """The number of the dialog states dropped beyond max_size"""
+        return self.__evicted_count
+
+    def stats(self) -> dict[str, int]:
+        """Returns the counters of the storage to be logged or exported"""
+        return {
+            "size": len(self.__entries),
+            "max_size": self.__config.max_size,
+            "expired": self.__expired_count,
+            "evicted": self.__evicted_count,
+        }
+
+    def __drop_expired(self, now: float) -> None:
+        entries = self.__entries
+        while entries:
+            user_id = next(iter(entries))
+            if entries[user_id].expires_at > now:
+                break
+            del entries[user_id]
+            self.__expired_count += 1
+
+    def __get_entry(self, user_id: str) -> _Entry | None:
+        now = time.monotonic()
+        self.__drop_expired(now)
+
+        entry = self.__entries.get(user_id)
+        if entry is not None:
+            entry.expires_at = now + self.__config.ttl
+            self.__entries.move_to_end(user_id)
+        return entry
+
+    def __put_entry(self, user_id: str) -> _Entry:
+        """Returns the user's entry creating it if there is no one"""
+        entry = self.__get_entry(user_id)
+        if entry is not None:
+            return entry
+
+        entry = _Entry(DEFAULT_STATE, {}, time.monotonic() + self.__config.ttl)
+        self.__entries[user_id] = entry
+
+        while len(self.__entries) > self.__config.max_size:
+            self.__entries.popitem(last=False)
+            self.__evicted_count += 1
+
+        return entry
+
+    async def close(self) -> None:
+        self.__entries.clear()
+
+    async def wait_closed(self) -> None:
+        pass
+
+    async def get_state(self, user_id: str) -> str:
+        entry = self.__get_entry(user_id)
+        return entry.state if entry is not None else DEFAULT_STATE
+
+    async def get_data(self, user_id: str) -> dict[str, Any]:
+        entry = self.__get_entry(user_id)
+        return copy.deepcopy(entry.data) if entry is not None else {}
+
+    async def set_state(self, user_id: str, state: str) -> None:
+        self.__put_entry(user_id).state = state
+
+    async def set_data(self, user_id: str, data: dict[str, Any]) -> None:
+        self.__put_entry(user_id).data = copy.deepcopy(data)
+
+    async def update_data(
+        self, user_id: str, data: dict[str, Any] | None = None, **kwargs
+    ) -> None:
+        self.__put_entry(user_id).data.update(
+            copy.deepcopy(data or {}), **kwargs
+        )
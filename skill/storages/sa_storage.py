@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import time
+from contextvars import ContextVar, Token
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable
+
+from aioalice.dispatcher.storage import DEFAULT_STATE, BaseStorage
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill.db.models.sa_models import DialogStateModel
+from skill.db.repos.sa_repo import dialect_insert
+
+# Dialog states read or changed by the request being processed
+# by the current task, keyed by the users ids
+_request_records: ContextVar[dict[str, dict[str, Any]] | None] = ContextVar(
+    "_request_records", default=None
+)
+
+
+class SAStorageConfig:
+    connection_provider: Callable[..., AsyncSession]
+    ttl: timedelta
+    flush_interval: float
+    batch_size: int
+    purge_interval: float
+    max_retry_interval: float
+
+    def __init__(
+        self,
+        connection_provider: Callable[..., AsyncSession],
+        ttl: timedelta = timedelta(hours=24),
+        flush_interval: float = 0.05,
+        batch_size: int = 500,
+        purge_interval: float = 600.0,
+        max_retry_interval: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            connection_provider (Callable[..., AsyncSession]): factory
+            of the sessions used by the storage
+
+            ttl (timedelta, optional): time after the last change
+            in which a dialog state expires.
+            Defaults to 24 hours.
+
+            flush_interval (float, optional): max number of seconds
+            the changes are buffered before they are written.
+            Defaults to 0.05.
+
+            batch_size (int, optional): number of buffered changes
+            which are written at once without waiting for the interval.
+            Defaults to 500.
+
+            purge_interval (float, optional): min number of seconds
+            between deletions of the expired dialog states.
+            Defaults to 600.0.
+
+            max_retry_interval (float, optional): max number of seconds
+            between retries of a failed write. The interval starts
+            at flush_interval and doubles on every failure.
+            Defaults to 5.0.
+        """
+        self.connection_provider = connection_provider
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.purge_interval = purge_interval
+        self.max_retry_interval = max_retry_interval
+
+
+class SAStorage(BaseStorage):
+    """Dialog states storage on top of the SQLAlchemy engine, shared by
+    all the skill processes. The dialog states expire after ttl.
+
+    The changes are buffered and written with one INSERT ... ON CONFLICT
+    DO UPDATE statement per batch, at most flush_interval seconds later.
+    The buffered changes are visible to the reads of the process at once.
+    A user's next request comes after much longer than flush_interval,
+    so the other processes see the changes in time.
+
+    If the storage is bound to the request with bind(), the dialog state
+    is read from the DB once per request. See skill.dispatcher.SkillDispatcher.
+    """
+
+    def __init__(self, config: SAStorageConfig) -> None:
+        self.__config = config
+        # Changed dialog states which are not written yet
+        self.__pending: dict[str, dict[str, Any]] = {}
+        # Changes being written, they are visible until the commit
+        self.__flushing: dict[str, dict[str, Any]] = {}
+        self.__flush_task: asyncio.Task | None = None
+        # Set when the buffer is full to write it without waiting
+        self.__batch_full = asyncio.Event()
+        self.__flush_lock = asyncio.Lock()
+        self.__last_purge = time.monotonic()
+
+    async def __get_record(self, user_id: str) -> dict[str, Any]:
+        """Returns a copy of the user's dialog state with the state
+        and data keys. The default one is returned if there is no
+        dialog state or it is expired."""
+        record = self.__pending.get(user_id)
+        if record is None:
+            record = self.__flushing.get(user_id)
+        if record is None:
+            record = (_request_records.get() or {}).get(user_id)
+        if record is not None:
+            return copy.deepcopy(record)
+
+        async with self.__config.connection_provider() as session:
+            q = select(DialogStateModel.state, DialogStateModel.data).where(
+                DialogStateModel.user_id == user_id,
+                DialogStateModel.expires_at > datetime.now(UTC),
+            )
+
+            row = (await session.execute(q)).first()
+
+        if row is None:
+            record = {"state": DEFAULT_STATE, "data": {}}
+        else:
+            state, data = row
+            record = {"state": state, "data": data}
+
+        self.__remember(user_id, record)
+        return record
+
+    def __remember(self, user_id: str, record: dict[str, Any]) -> None:
+        """Keeps a copy of the dialog state for the bound request"""
+        records = _request_records.get()
+        if records is not None:
+            records[user_id] = copy.deepcopy(record)
+
+    async def __put_record(self, user_id: str, record: dict[str, Any]) -> None:
+        """Buffers the changed dialog state and schedules its writing.
+        The writing is never awaited here, so a DB failure doesn't fail
+        the request which changed the dialog state."""
+        self.__pending[user_id] = record
+        self.__remember(user_id, record)
+
+        if len(self.__pending) >= self.__config.batch_size:
+            self.__batch_full.set()
+
+        if self.__flush_task is None or self.__flush_task.done():
+            self.__flush_task = asyncio.create_task(self.__flush_loop())
+
+    async def __flush_loop(self) -> None:
+        """Writes the buffered changes until there are none. A failed
+        write is logged and retried with an exponential backoff."""
+        retry_interval: float | None = None
+
+        while self.__pending:
+            if retry_interval is None:
+                try:
+                    await asyncio.wait_for(
+                        self.__batch_full.wait(), self.__config.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self.__batch_full.clear()
+            else:
+                # Not woken up by the full buffer while the DB fails
+                await asyncio.sleep(retry_interval)
+
+            try:
+                await self.flush()
+            except Exception:
+                if retry_interval is None:
+                    retry_interval = self.__config.flush_interval
+                else:
+                    retry_interval = min(
+                        retry_interval * 2, self.__config.max_retry_interval
+                    )
+                logging.exception(
+                    "Failed to write %d dialog states, retrying in %.2f s",
+                    len(self.__pending),
+                    retry_interval,
+                )
+            else:
+                retry_interval = None
+
+    async def flush(self) -> None:
+        """Writes all the buffered changes at once"""
+        async with self.__flush_lock:
+            if not self.__pending:
+                return
+
+            pending, self.__pending = self.__pending, {}
+            self.__flushing = pending
+            now = datetime.now(UTC)
+            expires_at = now + self.__config.ttl
+
+            try:
+                async with self.__config.connection_provider() as session:
+                    table = DialogStateModel.__table__
+                    q = dialect_insert(session, table)  # type: ignore
+                    q = q.on_conflict_do_update(
+                        index_elements=[table.c.user_id],  # type: ignore
+                        set_={
+                            "state": q.excluded.state,
+                            "data": q.excluded.data,
+                            "expires_at": q.excluded.expires_at,
+                        },
+                    )
+
+                    await session.execute(
+                        q,
+                        [
+                            {
+                                "user_id": user_id,
+                                "state": record["state"],
+                                "data": record["data"],
+                                "expires_at": expires_at,
+                            }
+                            for user_id, record in sorted(pending.items())
+                        ],
+                    )
+
+                    if (
+                        time.monotonic() - self.__last_purge
+                        >= self.__config.purge_interval
+                    ):
+                        await session.execute(
+                            delete(DialogStateModel).where(
+                                DialogStateModel.expires_at <= now
+                            )
+                        )
+                        self.__last_purge = time.monotonic()
+
+                    await session.commit()
+            except BaseException:
+                # The changes are kept to be written later, newer changes
+                # made while flushing win
+                self.__pending = pending | self.__pending
+                raise
+            finally:
+                self.__flushing = {}
+
+    def bind(self) -> Token:
+        """Starts caching the dialog states for the request being
+        processed by the current task, so the state read by the router
+        isn't read from the DB again by the handler
+
+        Returns:
+            Token: the token to pass to unbind()
+        """
+        return _request_records.set({})
+
+    def unbind(self, token: Token) -> None:
+        _request_records.reset(token)
+
+    async def close(self) -> None:
+        if self.__flush_task is not None:
+            self.__flush_task.cancel()
+        await self.flush()
+
+    async def wait_closed(self) -> None:
+        pass
+
+    async def get_state(self, user_id: str) -> str:
+        return (await self.__get_record(user_id))["state"]
+
+    async def get_data(self, user_id: str) -> dict[str, Any]:
+        return (await self.__get_record(user_id))["data"]
+
+    async def set_state(self, user_id: str, state: str) -> None:
+        record = await self.__get_record(user_id)
+        record["state"] = state
+        await self.__put_record(user_id, record)
+
+    async def set_data(self, user_id: str, data: dict[str, Any]) -> None:
+        record = await self.__get_record(user_id)
+        record["data"] = copy.deepcopy(data)
+        await self.__put_record(user_id, record)
+
+    async def update_data(
+        self, user_id: str, data: dict[str, Any] | None = None, **kwargs
+    ) -> None:
+        record = await self.__get_record(user_id)
+        record["data"].update(copy.deepcopy(data or {}), **kwargs)
+        await self.__put_record(user_id, record)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import copy
+from contextvars import ContextVar, Token
+from typing import Any
+
+from aioalice.dispatcher.storage import DEFAULT_STATE, BaseStorage
+from aioalice.types import AliceRequest, AliceResponse
+
+# Dialog state of the request being processed by the current task
+_session_record: ContextVar[dict[str, Any] | None] = ContextVar(
+    "_session_record", default=None
+)
+
+
+class SessionStateStorage(BaseStorage):
+    """Keeps the dialog state in the session state of Alice: the state
+    is read from state.session of the request and is sent back
+    in session_state of the response, which Alice echoes in the next
+    request of the session. So there is no server-side state at all
+    and any skill process can handle any request.
+
+    The storage only works for the request being processed, so it has
+    to be bound to it with bind() and the response has to be passed
+    to dump(). See skill.dispatcher.SkillDispatcher.
+    """
+
+    STATE_KEY = "state"
+    DATA_KEY = "data"
+
+    def bind(self, req: AliceRequest) -> Token:
+        """Loads the dialog state from the request for the current task
+
+        Args:
+            req (AliceRequest): the request being processed
+
+        Returns:
+            Token: the token to pass to unbind()
+        """
+        session_state = (req._raw_kwargs.get("state") or {}).get(
+            "session"
+        ) or {}
+
+        return _session_record.set(
+            {
+                "state": session_state.get(self.STATE_KEY) or DEFAULT_STATE,
+                "data": copy.deepcopy(session_state.get(self.DATA_KEY) or {}),
+            }
+        )
+
+    def unbind(self, token: Token) -> None:
+        _session_record.reset(token)
+
+    def dump(self, res: Any) -> Any:
+        """Puts the dialog state to session_state of the response
+
+        Args:
+            res (Any): the handler's result. Only AliceResponse
+            is changed
+
+        Returns:
+            Any: the same result
+        """
+        record = _session_record.get()
+        if record is None or not isinstance(res, AliceResponse):
+            return res
+
+        res.session_state = {
+            **(res.session_state or {}),
+            self.STATE_KEY: record["state"],
+            self.DATA_KEY: record["data"],
+        }
+
+        return res
+
+    def __record(self) -> dict[str, Any]:
+        record = _session_record.get()
+        if record is None:
+            raise RuntimeError(
+                "SessionStateStorage is used outside of a bound request"
+            )
+        return record
+
+    async def close(self) -> None:
+        pass
+
+    async def wait_closed(self) -> None:
+        pass
+
+    async def get_state(self, user_id: str) -> str:
+        return self.__record()["state"]
+
+    async def get_data(self, user_id: str) -> dict[str, Any]:
+        return copy.deepcopy(self.__record()["data"])
+
+    async def set_state(self, user_id: str, state: str) -> None:
+        self.__record()["state"] = state
+
+    async def set_data(self, user_id: str, data: dict[str, Any]) -> None:
+        self.__record()["data"] = copy.deepcopy(data)
+
+    async def update_data(
+        self, user_id: str, data: dict[str, Any] | None = None, **kwargs
+    ) -> None:
+        self.__record()["data"].update(copy.deepcopy(data or {}), **kwargs)
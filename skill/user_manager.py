@@ -2,13 +2,13 @@ from __future__ import annotations
 
 import datetime
 import logging
-import random
 from dataclasses import dataclass
 import pytz
 from skill.entities import User
 from skill.exceptions import InvalidInputError
 from skill.db.repos.base_repo import BaseRepo
 from skill.messages.base_messages import BaseMessages
+from skill.scoreboard import StreakScoreboard
 from skill.sleep_calculator import SleepCalculator, SleepMode
 from skill.states import States
 from skill.utils import TextWithTTS
@@ -25,13 +25,19 @@ class UserManager:
     user: User
     repo: BaseRepo
     messages: BaseMessages
+    scoreboard: StreakScoreboard | None
 
     def __init__(
-        self, user: User, repo: BaseRepo, messages: BaseMessages
+        self,
+        user: User,
+        repo: BaseRepo,
+        messages: BaseMessages,
+        scoreboard: StreakScoreboard | None = None,
     ) -> None:
         self.user = user
         self.repo = repo
         self.messages = messages
+        self.scoreboard = scoreboard
 
     @classmethod
     async def new_manager(
@@ -40,6 +46,7 @@ class UserManager:
         repo: BaseRepo,
         messages: BaseMessages,
         create_user_if_not_found: bool = True,
+        scoreboard: StreakScoreboard | None = None,
     ) -> UserManager:
         """Sets up UserManager with given user repo and messages.
         If user_id is not found in the DB and create_user_if_not_found
@@ -59,29 +66,38 @@ class UserManager:
             a new user if user_id is not found in the DB or not.
             Defaults to True.
 
+            scoreboard (StreakScoreboard | None, optional): in-memory
+            streak scoreboard used instead of counting the users
+            in the DB. Defaults to None.
+
         Returns:
             UserManager | None: proper UserManager instance. If
             the user_id is not found in the DB and create_user_if_not_found
             is False, returns None
         """
 
-        user = await repo.get_user_by_id(user_id)
-        # if not user and not create_user_if_not_found:
-        #    return None
-
-        if not user:
-            user = User(
-                id=user_id,
-                streak=0,
-                last_skill_use=None,
-                last_wake_up_time=None,
-                heard_tips=[],
-                join_date=datetime.datetime.now(),
-                repo=repo,
-            )
-            await repo.insert_user(user)
+        new_user = User(
+            id=user_id,
+            streak=0,
+            last_skill_use=None,
+            last_wake_up_time=None,
+            heard_tips=[],
+            join_date=datetime.datetime.now(),
+            repo=repo,
+        )
+        # The scoreboard is loaded before the user is created, so the
+        # loaded histogram never includes the user added below
+        if scoreboard is not None:
+            await scoreboard.refresh(repo)
 
-        inst = cls(user=user, repo=repo, messages=messages)
+        user = await repo.get_or_create_user(new_user)
+
+        if scoreboard is not None and user is new_user:
+            scoreboard.add(user._streak)
+
+        inst = cls(
+            user=user, repo=repo, messages=messages, scoreboard=scoreboard
+        )
         return inst
 
     def is_new_user(self):
@@ -102,10 +118,19 @@ class UserManager:
 
         streak = self.user._streak
 
-        score = await self.repo.count_users_with_streak(streak, "<=") - 1
-        if not percentages:
-            return score
-        total = await self.repo.count_all_users()
+        if self.scoreboard is not None:
+            await self.scoreboard.refresh(self.repo)
+            score = self.scoreboard.count_at_most(streak) - 1
+            if not percentages:
+                return score
+            total = self.scoreboard.total
+        else:
+            at_most, total = await self.repo.count_users_with_streak_at_most(
+                streak
+            )
+            score = at_most - 1
+            if not percentages:
+                return score
         percentage = round(score / total * 100)
         return percentage
 
@@ -135,6 +160,7 @@ class UserManager:
             now = datetime.datetime.now(pytz.utc)
 
         new_user = True
+        old_streak = self.user._streak
 
         if self.user.last_skill_use is not None:
             new_user = False
@@ -150,8 +176,16 @@ class UserManager:
 
         self.user.last_skill_use = now
 
+        # The scoreboard is loaded before the streak is saved, so the
+        # move below is applied to a histogram without it
+        if self.scoreboard is not None:
+            await self.scoreboard.refresh(self.repo)
+
         await self.repo.update_user(self.user)
 
+        if self.scoreboard is not None:
+            self.scoreboard.move(old_streak, self.user._streak)
+
         if new_user:
             return SkillResponse(
                 self.messages.get_start_message_intro(now),
@@ -188,17 +222,15 @@ class UserManager:
                 States.ASKING_FOR_TIP,
                 self.messages.TIP_TOPIC_SELECTION_BUTTONS_TEXT,
             )
-        tips = await self.repo.get_topic_tips(topic_id=topic._id)
-        heard_tips = self.user._heard_tips
-
-        if len(heard_tips) == len(tips):
-            self.user.drop_heard_tips()
-            heard_tips = []
-
-        if heard_tips:
-            tips = list(filter(lambda x: x not in heard_tips, tips))
-
-        tip = random.choice(tips)
+        tip = await self.repo.get_random_unheard_tip(
+            user_id=self.user._id, topic_id=topic._id
+        )
+        if tip is None:
+            return SkillResponse(
+                self.messages.get_wrong_topic_message(topic_name),
+                States.ASKING_FOR_TIP,
+                self.messages.TIP_TOPIC_SELECTION_BUTTONS_TEXT,
+            )
 
         self.user.add_heard_tip(tip)
 
@@ -280,9 +312,9 @@ class UserManager:
             sleep_calc_result = SleepCalculator.calc(
                 wake_up_time=wake_up_datetime, origin_time=now, mode=mode
             )
-        all_activities = await self.repo.get_activities()
+        activity_index = await self.repo.get_activity_index()
         activities = SleepCalculator.activities_compilation(
-            now, sleep_calc_result.bed_time, all_activities
+            now, sleep_calc_result.bed_time, activity_index
         )
         return SkillResponse(
             self.messages.get_sleep_calc_time_message(
@@ -4,7 +4,8 @@ import datetime
 import enum
 import itertools
 import random
-from typing import Any, Callable, Iterable, List, Union
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Iterable, List, TypeVar, Union
 
 
 class Daytime(enum.Enum):
@@ -113,6 +114,62 @@ class TextWithTTS:
         )
 
 
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded memo dropping the least recently used values,
+    with the hit and miss counters"""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__values: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__values)
+
+    def get_or_compute(self, key: K, compute: Callable[[], V]) -> V:
+        """Returns the cached value of the key, computing
+        and caching it on a miss
+
+        Args:
+            key (K): the key
+
+            compute (Callable[[], V]): computes the value on a miss
+
+        Returns:
+            V: the value
+        """
+        values = self.__values
+        try:
+            value = values[key]
+        except KeyError:
+            self.misses += 1
+            value = values[key] = compute()
+            if len(values) > self.maxsize:
+                values.popitem(last=False)
+            return value
+
+        self.hits += 1
+        values.move_to_end(key)
+        return value
+
+    def clear(self) -> None:
+        self.__values.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Returns the counters of the cache to be logged or exported"""
+        return {
+            "size": len(self.__values),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
 class IdComparable:
     _id: Any
 
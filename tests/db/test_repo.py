@@ -4,13 +4,16 @@ from uuid import uuid4
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import event
 
 from skill.db.repos.base_repo import BaseRepo
-from skill.db.repos.sa_repo import SARepo
+from skill.db.repos.cached_repo import (CachedContentRepo,
+                                        CachedContentRepoConfig)
+from skill.db.repos.sa_repo import SARepo, SARepoConfig
 from skill.entities import Activity, Tip, TipsTopic, User
 from skill.exceptions import NoSuchEntityInDB
 from skill.utils import TextWithTTS
-from tests.sa_db_settings import sa_repo_config
+from tests.sa_db_settings import async_session, engine, sa_repo_config
 
 repos_to_test = (SARepo(sa_repo_config),)
 
@@ -153,6 +156,141 @@ async def test_users(repo: BaseRepo, init_db):
     assert user == user_from_repo
 
 
+@pytest.mark.parametrize("repo", repos_to_test)
+@pytest.mark.asyncio
+async def test_get_or_create_user(repo: BaseRepo, init_db):
+    now = datetime.now()
+
+    user = User(
+        id=generate_random_string_id(),
+        streak=0,
+        last_skill_use=None,
+        heard_tips=[],
+        last_wake_up_time=None,
+        join_date=now,
+        repo=repo,
+    )
+
+    created_user = await repo.get_or_create_user(user)
+
+    assert created_user == user
+
+    assert await repo.get_user_by_id(user._id) == user
+
+    duplicate = User(
+        id=user._id,
+        streak=42,
+        last_skill_use=None,
+        heard_tips=[],
+        last_wake_up_time=None,
+        join_date=now + timedelta(seconds=1),
+        repo=repo,
+    )
+
+    existing_user = await repo.get_or_create_user(duplicate)
+
+    assert existing_user == user
+
+    assert existing_user._streak == 0
+
+    assert await repo.count_all_users() == 1
+
+
+@pytest.mark.parametrize("repo", repos_to_test)
+@pytest.mark.asyncio
+async def test_unit_of_work(repo: BaseRepo, init_db):
+    now = datetime.now()
+
+    user = User(
+        id=generate_random_string_id(),
+        streak=0,
+        last_skill_use=None,
+        heard_tips=[],
+        last_wake_up_time=None,
+        join_date=now,
+        repo=repo,
+    )
+
+    async with repo.unit_of_work():
+        await repo.insert_user(user)
+
+        await repo.update_user(user.increase_streak())
+
+        assert (await repo.get_user_by_id(user._id))._streak == 1
+
+        # Streak stats are written on the commit, but are seen
+        # inside of the unit of work at once
+        assert await repo.get_streak_histogram() == {1: 1}
+        assert await repo.count_users_with_streak_at_most(0) == (0, 1)
+
+    assert (await repo.get_user_by_id(user._id))._streak == 1
+    assert await repo.get_streak_histogram() == {1: 1}
+
+    with pytest.raises(RuntimeError):
+        async with repo.unit_of_work():
+            await repo.update_user(user.increase_streak())
+
+            raise RuntimeError()
+
+    assert (await repo.get_user_by_id(user._id))._streak == 1
+    assert await repo.get_streak_histogram() == {1: 1}
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_chunks(init_db):
+    repo = SARepo(SARepoConfig(async_session, bulk_chunk_size=2))
+
+    now = datetime.now()
+
+    topic = await repo.insert_tips_topic(
+        TipsTopic(
+            uuid4(),
+            TextWithTTS("Chunked topic"),
+            TextWithTTS("Topic for chunked inserts"),
+            now,
+            repo,
+        )
+    )
+
+    tips = await repo.insert_tips(
+        [
+            Tip(
+                uuid4(),
+                TextWithTTS(f"Chunked tip {i}"),
+                TextWithTTS(f"Chunked tip content {i}"),
+                topic,
+                now,
+                repo,
+            )
+            for i in range(5)
+        ]
+    )
+
+    assert len(await repo.get_topic_tips(topic._id)) == 5
+
+    users = await repo.insert_users(
+        [
+            User(
+                id=generate_random_string_id(),
+                streak=i,
+                last_skill_use=None,
+                heard_tips=[tip._id for tip in tips[:i]],
+                last_wake_up_time=None,
+                join_date=now,
+                repo=repo,
+            )
+            for i in range(5)
+        ]
+    )
+
+    assert await repo.count_all_users() == 5
+
+    for user in users:
+        user_from_repo = await repo.get_user_by_id(user._id)
+
+        assert await user_from_repo.get_heard_tips() == user._heard_tips
+
+
 @pytest.mark.parametrize("repo", repos_to_test)
 @pytest.mark.asyncio
 async def test_activities(repo: BaseRepo, init_db):
@@ -414,14 +552,126 @@ async def test_update(repo: BaseRepo, insert_values):
         timezone(timedelta(0))
     )
     assert updated_user.last_wake_up_time == user.last_wake_up_time
-    assert new_tip in user._heard_tips
-    assert new_tip in updated_user._heard_tips
+    assert new_tip._id in user._heard_tips
+    assert new_tip._id in updated_user._heard_tips
 
     user.drop_heard_tips()
 
     updated_user = await repo.update_user(user)
 
-    assert updated_user._heard_tips == []
+    assert updated_user._heard_tips == frozenset()
+
+
+@pytest.mark.parametrize("repo", repos_to_test)
+@pytest.mark.asyncio
+async def test_heard_tips_changes(repo: BaseRepo, insert_values):
+    user = (await repo.get_users(1))[0]
+
+    tip = (await repo.get_tips(1))[0]
+
+    await repo.update_user(user.add_heard_tip(tip))
+
+    assert user._added_heard_tips == []
+
+    user = await repo.get_user_by_id(user._id)
+
+    assert not user._heard_tips_loaded
+    assert await user.get_heard_tips() == {tip._id}
+
+    async with repo.unit_of_work():
+        user = await repo.get_user_by_id(user._id)
+
+        await repo.update_user(user.drop_heard_tips())
+
+        user = await repo.get_user_by_id(user._id)
+        assert not await user.get_heard_tips()
+
+    user = await repo.get_user_by_id(user._id)
+    assert not await user.get_heard_tips()
+
+
+@pytest.mark.parametrize("repo", repos_to_test)
+@pytest.mark.asyncio
+async def test_random_unheard_tip(repo: BaseRepo, insert_values):
+    user = (await repo.get_users(1))[0]
+
+    topic = (await repo.get_tips_topics(1))[0]
+
+    tips = await repo.get_topic_tips(topic._id)
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # The tip is picked with its topic by a single query
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        tip = await repo.get_random_unheard_tip(user._id, topic._id)
+    finally:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", count_statement
+        )
+
+    assert tip is not None and tip.tips_topic == topic
+    assert len(statements) == 1
+
+    heard = set()
+    for _ in tips:
+        tip = await repo.get_random_unheard_tip(user._id, topic._id)
+
+        assert tip is not None and tip._id not in heard
+
+        heard.add(tip._id)
+        await repo.update_user(user.add_heard_tip(tip))
+
+    # All the tips are heard, so they are dropped
+    tip = await repo.get_random_unheard_tip(user._id, topic._id)
+
+    assert tip in tips
+    assert not await repo.get_user_heard_tips(user._id)
+
+    empty_topic = (await repo.get_tips_topics())[1]
+
+    assert await repo.get_random_unheard_tip(user._id, empty_topic._id) is None
+
+
+@pytest.mark.parametrize("repo", repos_to_test)
+@pytest.mark.asyncio
+async def test_content_cache(repo: BaseRepo, insert_values):
+    cached_repo = CachedContentRepo(
+        CachedContentRepoConfig(repo, version_check_interval=0)
+    )
+
+    activities = await cached_repo.get_activities()
+    topic = (await cached_repo.get_tips_topics(1))[0]
+
+    assert activities == await repo.get_activities()
+    assert topic == await cached_repo.get_tips_topic_by_name(topic.name.text)
+    assert await cached_repo.get_topic_tips(
+        topic._id
+    ) == await repo.get_topic_tips(topic._id)
+
+    new_activity = await repo.insert_activity(
+        Activity(
+            uuid4(),
+            TextWithTTS("Почитать книгу"),
+            occupation_time=timedelta(minutes=30),
+            created_date=datetime.now(),
+            repo=repo,
+        )
+    )
+
+    # The content version is not bumped, so the cached content is served
+    assert await cached_repo.get_activities() == activities
+
+    await repo.bump_content_version()
+
+    assert new_activity in await cached_repo.get_activities()
+
+    await cached_repo.delete_activity(new_activity)
+
+    assert await cached_repo.get_activity_by_id(new_activity._id) is None
 
 
 @pytest.mark.parametrize("repo", repos_to_test)
@@ -484,6 +734,77 @@ async def test_users_stats(repo: BaseRepo, insert_values):
 
     assert await repo.count_users_with_streak(100, condition="==") == 1
 
+    assert await repo.get_streak_histogram() == {0: 1, 100: 1}
+
+    assert await repo.count_users_with_streak_at_most(100) == (2, 2)
+    assert await repo.count_users_with_streak_at_most(99) == (1, 2)
+
+    user = [user for user in await repo.get_users() if user._streak == 0][0]
+    stale_user = await repo.get_user_by_id(user._id)
+
+    await repo.update_user(user.increase_streak())
+
+    assert await repo.get_streak_histogram() == {1: 1, 100: 1}
+
+    # Unchanged streak doesn't change the stats
+    await repo.update_user(user)
+
+    assert await repo.get_streak_histogram() == {1: 1, 100: 1}
+
+    # Stats are changed from the streak in the DB, not the stale one
+    await repo.update_user(stale_user.increase_streak())
+
+    assert await repo.get_streak_histogram() == {1: 1, 100: 1}
+
+    await repo.update_user(stale_user.increase_streak())
+
+    assert await repo.get_streak_histogram() == {2: 1, 100: 1}
+
+    await repo.delete_user(user)
+
+    assert await repo.count_users_with_streak_at_most(100) == (1, 1)
+
+
+@pytest.mark.parametrize("repo", repos_to_test)
+@pytest.mark.asyncio
+async def test_drop_expired_streaks(repo: BaseRepo, init_db):
+    now = datetime.now(UTC)
+
+    users = await repo.insert_users(
+        [
+            User(
+                id=generate_random_string_id(),
+                streak=i % 3,
+                last_skill_use=now - timedelta(days=i % 5),
+                heard_tips=[],
+                last_wake_up_time=None,
+                join_date=now,
+                repo=repo,
+            )
+            for i in range(50)
+        ]
+    )
+
+    expired = [
+        user
+        for user in users
+        if user._streak and user.last_skill_use < now - timedelta(days=2)
+    ]
+
+    dropped = await repo.drop_expired_streaks(
+        now - timedelta(days=2), chunk_size=7
+    )
+
+    assert dropped == len(expired)
+
+    for user in expired:
+        assert (await repo.get_user_by_id(user._id))._streak == 0
+
+    histogram = await repo.get_streak_histogram()
+
+    assert sum(histogram.values()) == len(users)
+    assert histogram[0] == await repo.count_users_with_streak(0, "==")
+
 
 @pytest.mark.parametrize("repo", repos_to_test)
 @pytest.mark.asyncio
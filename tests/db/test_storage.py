@@ -0,0 +1,204 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from aioalice.dispatcher.storage import DEFAULT_STATE
+from sqlalchemy import select
+
+from skill.db.models.sa_models import DialogStateModel
+from skill.storages.get_storage import get_storage
+from skill.storages.sa_storage import SAStorage, SAStorageConfig
+from tests.sa_db_settings import async_session
+
+
+@pytest.mark.asyncio
+async def test_sa_storage(init_db):
+    storage = SAStorage(SAStorageConfig(connection_provider=async_session))
+    # Another skill process sharing the DB
+    other = SAStorage(SAStorageConfig(connection_provider=async_session))
+
+    assert await storage.get_state("user") == DEFAULT_STATE
+    assert await storage.get_data("user") == {}
+
+    await storage.set_state("user", "MAIN_MENU")
+    await storage.update_data("user", {"tip": 1}, topic="sleep")
+
+    # Buffered changes are visible at once
+    assert await storage.get_state("user") == "MAIN_MENU"
+    assert await storage.get_data("user") == {"tip": 1, "topic": "sleep"}
+
+    # and are written after flush_interval
+    await asyncio.sleep(0.2)
+    assert await other.get_state("user") == "MAIN_MENU"
+    assert await other.get_data("user") == {"tip": 1, "topic": "sleep"}
+
+    # Returned data is a copy
+    (await storage.get_data("user"))["tip"] = 2
+    assert (await storage.get_data("user"))["tip"] == 1
+
+    # A full batch is written without waiting for flush_interval
+    batching = SAStorage(
+        SAStorageConfig(
+            connection_provider=async_session,
+            flush_interval=60,
+            batch_size=3,
+        )
+    )
+    for i in range(3):
+        await batching.set_state(f"user{i}", f"STATE{i}")
+    await asyncio.sleep(0.2)
+    for i in range(3):
+        assert await other.get_state(f"user{i}") == f"STATE{i}"
+    await batching.close()
+
+    await other.reset_state("user", with_data=True)
+    await other.close()
+    assert await storage.get_state("user") == DEFAULT_STATE
+    assert await storage.get_data("user") == {}
+
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_sa_storage_ttl(init_db):
+    storage = SAStorage(
+        SAStorageConfig(
+            connection_provider=async_session,
+            ttl=timedelta(seconds=0.3),
+            purge_interval=0,
+        )
+    )
+
+    await storage.set_state("user", "MAIN_MENU")
+    await storage.close()
+    assert await storage.get_state("user") == "MAIN_MENU"
+
+    await asyncio.sleep(0.4)
+
+    # Expired dialog states are not returned
+    assert await storage.get_state("user") == DEFAULT_STATE
+
+    await storage.set_state("another_user", "MAIN_MENU")
+    # Flushing purges the expired dialog states
+    await storage.close()
+    async with async_session() as session:
+        user_ids = (
+            await session.scalars(select(DialogStateModel.user_id))
+        ).all()
+    assert user_ids == ["another_user"]
+
+
+class ControlledCommitSession:
+    """Session which commits as if the DB was slow or down: the commits
+    wait for the released event and the first ones fail"""
+
+    def __init__(
+        self,
+        session,
+        failures: list[int],
+        released: asyncio.Event | None = None,
+    ) -> None:
+        self.__session = session
+        self.__failures = failures
+        self.__released = released
+
+    async def __aenter__(self):
+        await self.__session.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        return await self.__session.__aexit__(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.__session, name)
+
+    async def commit(self) -> None:
+        if self.__released is not None:
+            await self.__released.wait()
+        if self.__failures[0] > 0:
+            self.__failures[0] -= 1
+            raise OSError("Connection refused")
+        await self.__session.commit()
+
+
+@pytest.mark.asyncio
+async def test_sa_storage_retry(init_db):
+    failures = [2]
+    storage = SAStorage(
+        SAStorageConfig(
+            connection_provider=lambda: ControlledCommitSession(
+                async_session(), failures
+            ),
+            batch_size=2,
+        )
+    )
+    other = SAStorage(SAStorageConfig(connection_provider=async_session))
+
+    # A full batch which fails to be written doesn't fail the requests
+    await storage.set_state("user1", "MAIN_MENU")
+    await storage.set_state("user2", "MAIN_MENU")
+    assert await storage.get_state("user1") == "MAIN_MENU"
+
+    # and is written on retry
+    await asyncio.sleep(0.5)
+    assert failures == [0]
+    assert await other.get_state("user1") == "MAIN_MENU"
+    assert await other.get_state("user2") == "MAIN_MENU"
+
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_sa_storage_in_flight(init_db):
+    released = asyncio.Event()
+    storage = SAStorage(
+        SAStorageConfig(
+            connection_provider=lambda: ControlledCommitSession(
+                async_session(), [0], released
+            )
+        )
+    )
+
+    await storage.set_state("user", "MAIN_MENU")
+    await asyncio.sleep(0.2)
+
+    # The changes being written are visible until the commit
+    assert await storage.get_state("user") == "MAIN_MENU"
+
+    released.set()
+    await storage.close()
+    assert await storage.get_state("user") == "MAIN_MENU"
+
+
+@pytest.mark.asyncio
+async def test_sa_storage_bound_request(init_db):
+    sessions = [0]
+
+    def connection_provider():
+        sessions[0] += 1
+        return async_session()
+
+    storage = SAStorage(
+        SAStorageConfig(
+            connection_provider=connection_provider, flush_interval=60
+        )
+    )
+
+    token = storage.bind()
+    try:
+        assert await storage.get_state("user") == DEFAULT_STATE
+        # The dialog state read by the router is not read again
+        await storage.set_state("user", "MAIN_MENU")
+        await storage.update_data("user", tip=1)
+        assert sessions == [1]
+    finally:
+        storage.unbind(token)
+
+    await storage.close()
+    assert sessions == [2]
+    assert await storage.get_data("user") == {"tip": 1}
+
+
+def test_get_storage_unknown_type():
+    with pytest.raises(ValueError):
+        get_storage("redis")  # type: ignore
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from aioalice.dispatcher.storage import DEFAULT_STATE
+
+from skill.states import States
+from skill.storages.memory_storage import (BoundedMemoryStorage,
+                                           BoundedMemoryStorageConfig)
+
+
+@pytest.mark.asyncio
+async def test_bounded_memory_storage():
+    storage = BoundedMemoryStorage(BoundedMemoryStorageConfig(max_size=3))
+
+    # Reads don't create dialog states
+    assert await storage.get_state("user0") == DEFAULT_STATE
+    assert await storage.get_data("user0") == {}
+    assert len(storage) == 0
+
+    for i in range(3):
+        await storage.set_state(f"user{i}", States.MAIN_MENU)
+    await storage.update_data("user0", {"hour": 7}, minute=0)
+    assert await storage.get_data("user0") == {"hour": 7, "minute": 0}
+
+    # user1 is the least recently used one now
+    await storage.get_state("user2")
+    await storage.set_state("user3", States.MAIN_MENU)
+
+    assert len(storage) == 3
+    assert storage.evicted_count == 1
+    assert await storage.get_state("user1") == DEFAULT_STATE
+    assert await storage.get_state("user0") == States.MAIN_MENU
+
+    await storage.reset_state("user0", with_data=True)
+    assert await storage.get_data("user0") == {}
+
+    assert storage.stats() == {
+        "size": 3,
+        "max_size": 3,
+        "expired": 0,
+        "evicted": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_bounded_memory_storage_ttl():
+    storage = BoundedMemoryStorage(BoundedMemoryStorageConfig(ttl=0.2))
+
+    await storage.set_state("user0", States.MAIN_MENU)
+    await storage.set_state("user1", States.MAIN_MENU)
+
+    await asyncio.sleep(0.15)
+    # Using a dialog state prolongs it
+    assert await storage.get_state("user1") == States.MAIN_MENU
+    await asyncio.sleep(0.1)
+
+    assert await storage.get_state("user0") == DEFAULT_STATE
+    assert await storage.get_state("user1") == States.MAIN_MENU
+    assert len(storage) == 1
+    assert storage.expired_count == 1
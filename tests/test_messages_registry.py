@@ -0,0 +1,29 @@
+from skill.messages import select
+from skill.messages.registry import get_buttons_with_text, get_messages
+from skill.messages.ru_messages import RUMessages
+
+
+def test_get_messages():
+    assert get_messages(RUMessages) is get_messages(RUMessages)
+    assert isinstance(get_messages(RUMessages), RUMessages)
+
+
+def test_get_buttons_with_text():
+    assert get_buttons_with_text(None) is None
+
+    buttons = get_buttons_with_text(RUMessages.MENU_BUTTONS_TEXT)
+    assert [button.title for button in buttons] == RUMessages.MENU_BUTTONS_TEXT
+    # The buttons are prebuilt once
+    assert get_buttons_with_text(list(RUMessages.MENU_BUTTONS_TEXT)) is buttons
+
+    buttons = get_buttons_with_text(["Новая кнопка"])
+    assert [button.to_json() for button in buttons] == [
+        {"title": "Новая кнопка", "url": None, "payload": None, "hide": True}
+    ]
+
+
+def test_for_locale():
+    messages = select.for_locale("ru-RU")
+    assert messages is get_messages(RUMessages)
+    # Unsupported locales fall back to the default messages
+    assert select.for_locale("en-US") is messages
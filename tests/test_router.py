@@ -0,0 +1,128 @@
+import asyncio
+import itertools
+
+import pytest
+from aioalice import Dispatcher
+from aioalice.dispatcher import MemoryStorage
+from aioalice.dispatcher.handler import Handler
+from aioalice.types.alice_request import AliceRequest
+
+from skill.router import IndexedHandler, IntentFilter
+from skill.states import States
+
+USER_ID = "47C73714B580ED2469056E71081159529FFC676A4E5B059D629A819E857DC2F8"
+
+
+def make_request(command: str, intents: list[str]) -> AliceRequest:
+    return AliceRequest(
+        None,
+        meta={
+            "locale": "ru-RU",
+            "timezone": "Europe/Moscow",
+            "client_id": "ru.yandex.searchplugin/7.16",
+            "interfaces": {"screen": {}},
+        },
+        request={
+            "command": command,
+            "original_utterance": command,
+            "type": "SimpleUtterance",
+            "nlu": {"intents": {intent: {} for intent in intents}},
+        },
+        session={
+            "message_id": 0,
+            "session_id": "2eac4854-fce721f3-b845abba-20d60",
+            "skill_id": "3ad36498-f5rd-4079-a14b-788652932056",
+            "user_id": USER_ID,
+            "new": False,
+        },
+        version="1.0",
+    )
+
+
+def make_dispatcher(handler_cls) -> Dispatcher:
+    dp = Dispatcher(storage=MemoryStorage(), loop=asyncio.get_event_loop())
+    if handler_cls is IndexedHandler:
+        dp.requests_handlers = IndexedHandler(dp)
+
+    def handler(name: str):
+        async def handle(alice_request: AliceRequest):
+            return name
+
+        return handle
+
+    dp.register_request_handler(
+        handler("help"), state=States.SELECTING_TIME, func=IntentFilter("HELP")
+    )
+    dp.register_request_handler(
+        handler("quit"), state=States.all(), func=IntentFilter("QUIT")
+    )
+    dp.register_request_handler(
+        handler("quit"), state=States.all(), contains=["выход"]
+    )
+    dp.register_request_handler(
+        handler("menu"),
+        state=States.all(),
+        func=IntentFilter("TO_MENU"),
+        contains=["меню"],
+    )
+    dp.register_request_handler(
+        handler("menu"), state=States.all(), contains=["меню", "выйди"]
+    )
+    dp.register_request_handler(
+        handler("tip"), state=States.MAIN_MENU, contains=["совет"]
+    )
+    dp.register_request_handler(
+        handler("night_tip"),
+        state=States.ASKING_FOR_TIP,
+        contains=["ночной"],
+    )
+    dp.register_request_handler(
+        handler("reask_tip"), state=States.ASKING_FOR_TIP
+    )
+    dp.register_request_handler(
+        handler("lambda"),
+        state=States.MAIN_MENU,
+        func=lambda req: req.request.command.startswith("когда"),
+    )
+    dp.register_request_handler(handler("welcome"))
+    dp.register_request_handler(handler("universal"), state=States.all())
+
+    return dp
+
+
+@pytest.mark.asyncio
+async def test_indexed_handler():
+    default_dp = make_dispatcher(Handler)
+    indexed_dp = make_dispatcher(IndexedHandler)
+
+    commands = [
+        "",
+        "меню",
+        "выйди в меню",
+        "выход",
+        "дай совет",
+        "ночной совет",
+        "когда спать",
+        "привет",
+    ]
+    intent_sets = [[], ["HELP"], ["QUIT"], ["TO_MENU"], ["HELP", "TO_MENU"]]
+    states = [None, *States.all()]
+
+    for command, intents, state in itertools.product(
+        commands, intent_sets, states
+    ):
+        for dp in (default_dp, indexed_dp):
+            if state is None:
+                await dp.storage.reset_state(USER_ID)
+            else:
+                await dp.storage.set_state(USER_ID, state)
+
+        request = make_request(command, intents)
+
+        assert await indexed_dp.process_request(
+            request
+        ) == await default_dp.process_request(request), (
+            command,
+            intents,
+            state,
+        )
@@ -0,0 +1,43 @@
+import random
+
+from skill.scoreboard import StreakScoreboard
+
+
+def test_scoreboard():
+    streaks = [random.randint(0, 50) for _ in range(1000)]
+
+    histogram: dict[int, int] = {}
+    for streak in streaks:
+        histogram[streak] = histogram.get(streak, 0) + 1
+
+    scoreboard = StreakScoreboard().load(histogram)
+
+    assert scoreboard.total == len(streaks)
+
+    for _ in range(100):
+        i = random.randrange(len(streaks))
+        new_streak = random.randint(0, 200)
+        scoreboard.move(streaks[i], new_streak)
+        streaks[i] = new_streak
+
+    scoreboard.add(1000)
+    streaks.append(1000)
+
+    assert scoreboard.total == len(streaks)
+
+    for streak in (-1, 0, 1, 25, 50, 199, 200, 1000, 5000):
+        assert scoreboard.count_at_most(streak) == len(
+            [x for x in streaks if x <= streak]
+        )
+
+
+def test_empty_scoreboard():
+    scoreboard = StreakScoreboard().load({})
+
+    assert scoreboard.total == 0
+    assert scoreboard.count_at_most(10) == 0
+
+    scoreboard.add(3)
+
+    assert scoreboard.count_at_most(2) == 0
+    assert scoreboard.count_at_most(3) == 1
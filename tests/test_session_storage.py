@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from aioalice.dispatcher.storage import DEFAULT_STATE
+from aioalice.types.alice_request import AliceRequest
+
+from skill.dispatcher import SkillDispatcher
+from skill.states import States
+from skill.storages.session_storage import SessionStateStorage
+
+USER_ID = "47C73714B580ED2469056E71081159529FFC676A4E5B059D629A819E857DC2F8"
+
+
+def make_request(command: str, session_state: dict | None) -> AliceRequest:
+    kwargs = {}
+    if session_state is not None:
+        kwargs["state"] = {"session": session_state, "user": {}}
+
+    return AliceRequest(
+        None,
+        meta={
+            "locale": "ru-RU",
+            "timezone": "Europe/Moscow",
+            "client_id": "ru.yandex.searchplugin/7.16",
+            "interfaces": {"screen": {}},
+        },
+        request={
+            "command": command,
+            "original_utterance": command,
+            "type": "SimpleUtterance",
+        },
+        session={
+            "message_id": 0,
+            "session_id": "2eac4854-fce721f3-b845abba-20d60",
+            "skill_id": "3ad36498-f5rd-4079-a14b-788652932056",
+            "user_id": USER_ID,
+            "new": session_state is None,
+        },
+        version="1.0",
+        **kwargs,
+    )
+
+
+def make_dispatcher() -> SkillDispatcher:
+    dp = SkillDispatcher(storage=SessionStateStorage())
+
+    @dp.request_handler(contains="в 7")
+    async def select_time(alice_request: AliceRequest):
+        user_id = alice_request.session.user_id
+        await dp.storage.set_data(user_id, {"hour": 7, "minute": 0})
+        await dp.storage.set_state(user_id, States.IN_CALCULATOR)
+        return alice_request.response("mode?")
+
+    @dp.request_handler(state=States.IN_CALCULATOR)
+    async def calculate(alice_request: AliceRequest):
+        user_id = alice_request.session.user_id
+        time = await dp.storage.get_data(user_id)
+        await dp.storage.set_state(user_id, States.CALCULATED)
+        return alice_request.response(f"{time['hour']}:{time['minute']}")
+
+    @dp.request_handler(state="*")
+    async def fallback(alice_request: AliceRequest):
+        state = await dp.storage.get_state(alice_request.session.user_id)
+        return alice_request.response(state)
+
+    return dp
+
+
+@pytest.mark.asyncio
+async def test_session_state_round_trip():
+    dp = make_dispatcher()
+
+    res = await dp.process_request(make_request("привет", None))
+    assert res.response.text == DEFAULT_STATE
+
+    res = await dp.process_request(make_request("встать в 7", {}))
+    assert res.session_state == {
+        "state": States.IN_CALCULATOR,
+        "data": {"hour": 7, "minute": 0},
+    }
+
+    # Alice echoes the session state back, so any process handles it
+    res = await dp.process_request(
+        make_request("долгий сон", res.to_json()["session_state"])
+    )
+    assert res.response.text == "7:0"
+    assert res.session_state["state"] == States.CALCULATED
+
+    # Without the echoed state the dialog starts over
+    res = await dp.process_request(make_request("долгий сон", {}))
+    assert res.response.text == DEFAULT_STATE
+
+
+@pytest.mark.asyncio
+async def test_session_state_isolation():
+    dp = make_dispatcher()
+    session_state = {
+        "state": States.IN_CALCULATOR,
+        "data": {"hour": 7, "minute": 0},
+    }
+
+    results = await asyncio.gather(
+        *(
+            dp.process_request(make_request("сон", session_state))
+            for _ in range(10)
+        ),
+        dp.process_request(make_request("сон", {})),
+    )
+
+    assert [res.response.text for res in results] == ["7:0"] * 10 + [
+        DEFAULT_STATE
+    ]
+    # The request's state is not changed in place
+    assert session_state["state"] == States.IN_CALCULATOR
+
+    with pytest.raises(RuntimeError):
+        await dp.storage.get_state(USER_ID)
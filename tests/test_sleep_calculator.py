@@ -0,0 +1,252 @@
+import datetime
+import random
+from uuid import uuid4
+
+import pytest
+
+from skill.db.repos.sa_repo import SARepo
+from skill.entities import Activity
+from skill.exceptions import InvalidInputError
+from skill.sleep_calculator import (MODE_KEPT, NO_MODE_FITS, SLEEP_MODE_SPECS,
+                                    ActivityIndex, SleepCalculator, SleepMode,
+                                    SleepModeRegistry, SleepModeSpec)
+from skill.utils import TextWithTTS
+from tests.sa_db_settings import sa_repo_config
+
+
+def test_activity_index():
+    repo = SARepo(sa_repo_config)
+    now = datetime.datetime.now()
+
+    activities = [
+        Activity(
+            id=uuid4(),
+            description=TextWithTTS(f"activity {i}"),
+            created_date=now,
+            occupation_time=datetime.timedelta(minutes=random.randint(1, 60)),
+            repo=repo,
+        )
+        for i in range(100)
+    ]
+    index = ActivityIndex(activities)
+
+    for minutes in (0, 1, 15, 30, 59, 60, 61, 120):
+        delta = datetime.timedelta(minutes=minutes)
+        expected = sorted(
+            filter(lambda x: x.occupation_time < delta, activities),
+            reverse=True,
+            key=lambda x: x.occupation_time,
+        )
+
+        assert index.best_fitting(delta, limit=3) == expected[:3]
+        assert (
+            SleepCalculator.activities_compilation(
+                now, now + delta, activities, limit=3
+            )
+            == expected[:3]
+        )
+
+        selected = index.random_fitting(delta, limit=3, pool_size=10)
+
+        assert len(selected) == min(3, len(expected))
+        assert all(activity in expected[:10] for activity in selected)
+
+
+def test_calc_modes():
+    origin = datetime.datetime(2024, 1, 1, 22, tzinfo=datetime.timezone.utc)
+
+    def calc(hours: int, minutes: int, mode: SleepMode):
+        return SleepCalculator.calc(
+            origin + datetime.timedelta(hours=hours, minutes=minutes),
+            origin,
+            mode,
+        )
+
+    result = calc(10, 0, SleepMode.LONG)
+    assert result.sleep_time == datetime.timedelta(hours=9)
+    assert result.bed_time == origin + datetime.timedelta(hours=1)
+    assert result.changed_mode is None
+
+    result = calc(0, 30, SleepMode.VERY_SHORT)
+    assert result.sleep_time == datetime.timedelta(minutes=15)
+    assert result.changed_mode is None
+
+    # The longest fitting mode is proposed instead
+    result = calc(8, 20, SleepMode.LONG)
+    assert result.sleep_time == datetime.timedelta(hours=7, minutes=30)
+    assert result.selected_mode == SleepMode.LONG
+    assert result.changed_mode == SleepMode.MEDIUM
+
+    result = calc(2, 0, SleepMode.SHORT)
+    assert result.sleep_time == datetime.timedelta(hours=1, minutes=45)
+    assert result.changed_mode == SleepMode.VERY_SHORT
+
+    # The sleep time is capped
+    result = calc(23, 0, SleepMode.SHORT)
+    assert result.sleep_time == datetime.timedelta(hours=6)
+
+    with pytest.raises(InvalidInputError):
+        calc(0, 20, SleepMode.VERY_SHORT)
+
+
+def test_calc_many():
+    np = pytest.importorskip("numpy")
+
+    origin = datetime.datetime(2024, 1, 1, 22)
+    origin_times = np.array(
+        [
+            origin + datetime.timedelta(seconds=random.randint(0, 3600))
+            for _ in range(1000)
+        ],
+        dtype="datetime64[us]",
+    )
+    wake_up_times = origin_times + np.array(
+        [random.randint(-600, 24 * 3600) for _ in range(1000)],
+        dtype="timedelta64[s]",
+    )
+    modes = np.array(
+        [random.choice(list(SleepMode)).value for _ in range(1000)]
+    )
+
+    res = SleepCalculator.calc_many(wake_up_times, origin_times, modes)
+
+    for i in range(1000):
+        try:
+            expected = SleepCalculator.calc(
+                wake_up_times[i].item(),
+                origin_times[i].item(),
+                SleepMode(modes[i]),
+            )
+        except InvalidInputError:
+            assert res.changed_modes[i] == NO_MODE_FITS
+            assert np.isnat(res.bed_times[i])
+            assert np.isnat(res.sleep_times[i])
+            continue
+
+        assert res.bed_times[i].item() == expected.bed_time
+        assert res.sleep_times[i].item() == expected.sleep_time
+        if expected.changed_mode is None:
+            assert res.changed_modes[i] == MODE_KEPT
+        else:
+            assert res.changed_modes[i] == expected.changed_mode.value
+
+    # One mode for all the inputs
+    res = SleepCalculator.calc_many(
+        wake_up_times, origin_times[0], SleepMode.SHORT
+    )
+    assert res.sleep_times.shape == (1000,)
+
+    # Unknown modes codes don't fit
+    res = SleepCalculator.calc_many(
+        np.datetime64(origin + datetime.timedelta(hours=8)),
+        np.full(2, np.datetime64(origin)),
+        np.array([-1, 9]),
+    )
+    assert (res.changed_modes == NO_MODE_FITS).all()
+    assert np.isnat(res.bed_times).all()
+    assert np.isnat(res.sleep_times).all()
+
+
+def test_calc_lookup_table():
+    origin = datetime.datetime(2024, 1, 1, 22, 0, 7)
+    cases = [
+        (origin + datetime.timedelta(minutes=minutes, seconds=seconds), mode)
+        for minutes in range(0, 25 * 60, 7)
+        for seconds in (0, 59)
+        for mode in SleepMode
+    ]
+
+    def calc_all():
+        res = []
+        for wake_up_time, mode in cases:
+            try:
+                res.append(SleepCalculator.calc(wake_up_time, origin, mode))
+            except InvalidInputError:
+                res.append(None)
+        return res
+
+    expected = calc_all()
+
+    SleepCalculator.use_lookup_table(datetime.timedelta(hours=24))
+    try:
+        assert calc_all() == expected
+    finally:
+        SleepCalculator.drop_lookup_table()
+
+
+def test_activity_index_cache():
+    repo = SARepo(sa_repo_config)
+    now = datetime.datetime.now()
+
+    for seconds in (0, 30):
+        activities = [
+            Activity(
+                id=uuid4(),
+                description=TextWithTTS(f"activity {i}"),
+                created_date=now,
+                occupation_time=datetime.timedelta(
+                    minutes=random.randint(1, 60), seconds=seconds
+                ),
+                repo=repo,
+            )
+            for i in range(100)
+        ]
+        index = ActivityIndex(activities, cache_size=100)
+
+        for _ in range(2):
+            for minutes in range(0, 70, 3):
+                for delta_seconds in (0, 1, 30, 59):
+                    delta = datetime.timedelta(
+                        minutes=minutes, seconds=delta_seconds
+                    )
+                    expected = sorted(
+                        filter(
+                            lambda x: x.occupation_time < delta, activities
+                        ),
+                        reverse=True,
+                        key=lambda x: x.occupation_time,
+                    )
+                    assert [
+                        activity.occupation_time
+                        for activity in index.best_fitting(delta, limit=3)
+                    ] == [
+                        activity.occupation_time for activity in expected[:3]
+                    ]
+
+        assert len(index.cache) <= 100
+        assert index.cache.hits > 0
+        assert index.cache.hits + index.cache.misses == 2 * 24 * 4
+
+
+def test_sleep_mode_registry():
+    registry = SleepModeRegistry()
+    specs = list(SLEEP_MODE_SPECS)
+    random.shuffle(specs)
+    for spec in specs:
+        registry.register(spec)
+
+    modes = registry.compiled()
+    assert registry.frozen
+    assert modes is registry.compiled()
+    assert [spec.priority for spec in modes.specs] == [0, 1, 2, 3]
+
+    # The fallback search finds the first fitting mode by priority
+    for minutes in range(0, 24 * 60):
+        delta = datetime.timedelta(minutes=minutes)
+        expected = next(
+            (spec for spec in modes.specs if spec.fit(delta)), None
+        )
+        assert modes.fallback(delta) is expected
+
+    with pytest.raises(RuntimeError):
+        registry.register(SLEEP_MODE_SPECS[0])
+
+    with pytest.raises(ValueError):
+        SleepModeSpec(
+            mode=SleepMode.LONG,
+            priority=0,
+            offset=datetime.timedelta(0),
+            step=datetime.timedelta(hours=1),
+            min_time=datetime.timedelta(hours=2),
+            max_time=datetime.timedelta(hours=1),
+        )
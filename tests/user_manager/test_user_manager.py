@@ -8,6 +8,7 @@ import pytz
 from skill.db.repos.sa_repo import SARepo
 from skill.entities import Activity, TipsTopic, User
 from skill.messages.ru_messages import RUMessages
+from skill.scoreboard import StreakScoreboard
 from skill.sleep_calculator import SleepMode
 from skill.user_manager import UserManager
 from skill.utils import TextWithTTS
@@ -347,3 +348,82 @@ async def test_tips():
         message2 = await user_manager.ask_tip(tips_topic.name.text)
         assert isinstance(message2, TextWithTTS)
         assert exclude not in message2.text
+
+
+@pytest.mark.asyncio
+async def test_count_scoreboard_in_unit_of_work(init_db):
+    repo = SARepo(sa_repo_config)
+    messages = RUMessages()
+    now = datetime.datetime.now(tz=pytz.utc)
+
+    users = [
+        User(
+            id=generate_random_string_id(),
+            streak=5,
+            last_skill_use=now - datetime.timedelta(days=3),
+            last_wake_up_time=None,
+            heard_tips=[],
+            join_date=now,
+            repo=repo,
+        )
+        for _ in range(3)
+    ]
+    await repo.insert_users(users)
+
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            users[0]._id, repo, messages
+        )
+
+        # The streak is dropped, the streak stats see it before the commit
+        await user_manager.check_in(now)
+
+        assert user_manager.user._streak == 0
+        assert await user_manager.count_scoreboard() == 0
+        assert await user_manager.count_scoreboard(percentages=False) == 0
+
+
+@pytest.mark.asyncio
+async def test_check_in_scoreboard_first_request(init_db):
+    repo = SARepo(sa_repo_config)
+    messages = RUMessages()
+    now = datetime.datetime.now(tz=pytz.utc)
+
+    users = [
+        User(
+            id=generate_random_string_id(),
+            streak=5,
+            last_skill_use=now - datetime.timedelta(days=3),
+            last_wake_up_time=None,
+            heard_tips=[],
+            join_date=now,
+            repo=repo,
+        )
+        for _ in range(3)
+    ]
+    await repo.insert_users(users)
+
+    # The scoreboard is not loaded yet, the first request loads it
+    scoreboard = StreakScoreboard()
+
+    async with repo.unit_of_work():
+        user_manager = await UserManager.new_manager(
+            users[0]._id, repo, messages, scoreboard=scoreboard
+        )
+
+        await user_manager.check_in(now)
+
+        assert await user_manager.count_scoreboard() == 0
+
+    assert scoreboard.total == 3
+    assert scoreboard.count_at_most(0) == 1
+
+    # A new user is added to the loaded scoreboard once
+    scoreboard = StreakScoreboard()
+
+    user_manager = await UserManager.new_manager(
+        generate_random_string_id(), repo, messages, scoreboard=scoreboard
+    )
+
+    assert scoreboard.total == 4
+    assert scoreboard.count_at_most(0) == 2